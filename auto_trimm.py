@@ -2,106 +2,443 @@ import tkinter as tk
 from tkinter import messagebox, simpledialog
 import cv2
 import numpy as np
-from PIL import Image, ImageTk, ImageGrab
 from ultralytics import YOLO
 from collections import deque
 import torch
+import torch.nn.functional as F
+from contextlib import contextmanager
+import os
+import queue
 import sys
+import tempfile
+import threading
+import yaml
+
+try:
+    import decord # Optional: NVDEC decoding straight into CUDA tensors
+except ImportError:
+    decord = None
+
+BATCH_SIZE = 8     # Frames sent to the GPU per model.track() call
+INFER_SIZE = 640   # Long side of the inference tensor (multiple of 32)
+BALL_CLASS = 32    # Sports Ball (COCO Dataset)
+CALIB_FRAMES = 200 # Frames sampled from the video for INT8 calibration
+QUEUE_SIZE = 8     # Max frames buffered between inference and display
+PREFETCH_BATCHES = 2 # Decoded batches buffered ahead of inference
+WINDOW_NAME = "AI Ball Tracker (Max Level)"
 
 # ================= AI ENGINE (YOLOv8) =================
+@contextmanager
+def trusted_torch_load():
+    """PyTorch 2.6 security patch: lets Ultralytics unpickle its own .pt checkpoints"""
+    _original_load = torch.load
+    def patched_load(*args, **kwargs):
+        if 'weights_only' not in kwargs: kwargs['weights_only'] = False
+        return _original_load(*args, **kwargs)
+
+    try:
+        torch.load = patched_load
+        yield
+    finally:
+        torch.load = _original_load
+
+def _put(q, item, stop):
+    """Blocking put that gives up once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _get(q, stop):
+    """Blocking get that returns None once the pipeline is stopped"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+def open_capture(video_path):
+    """Opens a video on the FFmpeg backend with hardware decoding (NVDEC/QuickSync/VAAPI) when available"""
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG,
+                           [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+    if not cap.isOpened():
+        cap = cv2.VideoCapture(video_path)
+    return cap
+
 class AI_Tracker:
-    def __init__(self, model_size="yolov8n.pt"):
+    def __init__(self, model_size="yolov8n.pt", batch_size=BATCH_SIZE, precision="fp16"):
         self.model_path = model_size
         self.model = None
         self.ball_trace = deque(maxlen=30) # Remembers last 30 frames (The "Tail")
+        self._trace_runs = self._build_trace_runs(self.ball_trace.maxlen)
+        self.batch_size = batch_size
+        self.use_cuda = torch.cuda.is_available()
+        # INT8 is opt-in (its calibration export takes minutes); "auto" picks it on Turing+ tensor cores
+        if precision == "auto":
+            int8_ok = self.use_cuda and torch.cuda.get_device_capability() >= (7, 5)
+            precision = "int8" if int8_ok else "fp16"
+        self.precision = precision
+        self._pinned = None # Pinned host staging buffer, reused across batches
+        self.input_dtype = torch.float32 # FP16 engines take half inputs directly
         
-    def load_model(self):
-        """Safely loads YOLOv8 with PyTorch 2.6 fix"""
+    def _write_calibration_set(self, video_path, calib_dir):
+        """Samples frames uniformly from the video into an Ultralytics dataset yaml for INT8 calibration"""
+        img_dir = os.path.join(calib_dir, "images")
+        os.makedirs(img_dir, exist_ok=True)
+
+        cap = open_capture(video_path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for n, idx in enumerate(np.linspace(0, max(total - 1, 0), CALIB_FRAMES, dtype=int)):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(idx))
+            ret, frame = cap.read()
+            if not ret: break
+            frame = cv2.resize(frame, (INFER_SIZE, INFER_SIZE), interpolation=cv2.INTER_AREA)
+            cv2.imwrite(os.path.join(img_dir, f"calib_{n:04d}.jpg"), frame)
+        cap.release()
+
+        with trusted_torch_load():
+            names = YOLO(self.model_path).names
+        data_yaml = os.path.join(calib_dir, "calib.yaml")
+        with open(data_yaml, "w") as f:
+            yaml.safe_dump({"path": os.path.abspath(calib_dir), "train": "images",
+                            "val": "images", "names": names}, f)
+        return data_yaml
+
+    def _ensure_engine(self, calib_video=None):
+        """Returns a TensorRT engine for the .pt weights, exporting it once if missing.
+
+        INT8 needs calib_video to build its calibration set; without one the
+        export falls back to FP16.
+        """
+        if self.model_path.endswith(".engine"): return self.model_path
+        if not self.use_cuda: return None
+
+        int8 = self.precision == "int8" and calib_video is not None
+        stem = os.path.splitext(self.model_path)[0]
+        engine_path = f"{stem}_int8.engine" if int8 else f"{stem}.engine"
+        if os.path.exists(engine_path): return engine_path
+
+        print(f"🔧 Exporting TensorRT {'INT8' if int8 else 'FP16'} engine (one-time, takes a few minutes)...")
+        # Ultralytics always writes <stem>.engine, so an existing FP16 engine is moved aside
+        # during an INT8 export and put back afterwards
+        default_engine = f"{stem}.engine"
+        set_aside = None
+        if int8 and os.path.exists(default_engine):
+            set_aside = f"{default_engine}.fp16"
+            os.replace(default_engine, set_aside)
+        try:
+            # Calibration frames only live for the export, outside the working directory
+            with tempfile.TemporaryDirectory(prefix="int8_calib_") as calib_dir:
+                export_args = dict(format='engine', imgsz=INFER_SIZE, dynamic=True,
+                                   batch=self.batch_size, device=0)
+                if int8:
+                    export_args.update(int8=True, data=self._write_calibration_set(calib_video, calib_dir))
+                else:
+                    export_args.update(half=True)
+                with trusted_torch_load():
+                    exported = YOLO(self.model_path).export(**export_args)
+            if os.path.abspath(exported) != os.path.abspath(engine_path):
+                os.replace(exported, engine_path)
+            return engine_path
+        except Exception as e:
+            print(f"⚠️ TensorRT export unavailable ({e}). Using PyTorch weights.")
+            return None
+        finally:
+            if set_aside:
+                os.replace(set_aside, default_engine)
+
+    def load_model(self, calib_video=None):
+        """Safely loads YOLOv8, preferring a TensorRT engine on NVIDIA GPUs"""
         if self.model is not None: return
 
         print("🧠 Loading AI Model...")
-        # --- PYTORCH 2.6 SECURITY PATCH ---
-        _original_load = torch.load
-        def patched_load(*args, **kwargs):
-            if 'weights_only' not in kwargs: kwargs['weights_only'] = False
-            return _original_load(*args, **kwargs)
-            
+        engine_path = self._ensure_engine(calib_video)
+        if engine_path:
+            # Engines are not pickles, so no torch.load patch is needed
+            self.model_path = engine_path
+            self.model = YOLO(engine_path, task='detect')
+            if not engine_path.endswith("_int8.engine"):
+                self.input_dtype = torch.float16
+        else:
+            with trusted_torch_load():
+                self.model = YOLO(self.model_path)
+            self._compile_model()
+        print(f"✅ AI Ready ({os.path.basename(self.model_path)}).")
+
+    def _compile_model(self):
+        """Fallback when no TensorRT engine: torch.compile the eager detector to cut per-op dispatch"""
+        if self.use_cuda:
+            torch.backends.cudnn.benchmark = True
+            torch.set_float32_matmul_precision('high')
+        if not hasattr(torch, "compile"): return
+
+        # Warmup builds the predictor (and fuses Conv+BN) so we compile the module it actually runs
+        self.model.predict(np.zeros((INFER_SIZE, INFER_SIZE, 3), dtype=np.uint8), verbose=False)
+        backend = self.model.predictor.model # AutoBackend
         try:
-            torch.load = patched_load
-            self.model = YOLO(self.model_path)
-        finally:
-            torch.load = _original_load
-        print("✅ AI Ready.")
+            import torch._dynamo
+            torch._dynamo.config.suppress_errors = True # Fall back to eager if a graph fails to compile
+            backend.model = torch.compile(backend.model, mode='reduce-overhead', dynamic=False)
+            print("⚙️ Detector compiled with torch.compile.")
+        except Exception as e:
+            print(f"⚠️ torch.compile unavailable ({e}). Running eager PyTorch.")
+
+    def _to_batch_tensor(self, frames, gpu_rgb=None):
+        """Builds one normalized RGB CUDA tensor sized for the model.
+
+        Host BGR frames go through a pinned staging buffer; when the decoder
+        already produced an (N, H, W, 3) RGB uint8 CUDA tensor it is used as is.
+        Returns the (N, 3, H, W) tensor and the (sx, sy) factors that map box
+        coordinates back onto the original frames.
+        """
+        n = len(frames)
+        h, w = frames[0].shape[:2]
+        if gpu_rgb is None:
+            if self._pinned is None or self._pinned.shape[1:3] != (h, w):
+                self._pinned = torch.empty((self.batch_size, h, w, 3), dtype=torch.uint8).pin_memory()
+            staging = self._pinned.numpy()
+            for i, frame in enumerate(frames):
+                np.copyto(staging[i], frame)
+            batch, channels = self._pinned[:n].to('cuda', non_blocking=True), [2, 1, 0] # BGR
+        else:
+            batch, channels = gpu_rgb, None # Already RGB
+
+        # Only the uint8 -> float cast runs at full resolution: the permute is
+        # a view, and the channel swap and /255 wait until after the resize,
+        # where the tensor is several times smaller.
+        batch = batch.permute(0, 3, 1, 2).to(self.input_dtype)
+
+        # Tensor sources must be stride-aligned, so resize on the GPU
+        scale = INFER_SIZE / max(h, w)
+        size = (max(32, round(h * scale / 32) * 32), max(32, round(w * scale / 32) * 32))
+        if size != (h, w):
+            batch = F.interpolate(batch, size=size, mode='bilinear', align_corners=False)
+
+        if channels is not None:
+            batch = batch[:, channels]
+        return batch.mul_(1.0 / 255.0), (w / size[1], h / size[0])
+
+    def _track_batch(self, frames, gpu_rgb=None):
+        """Runs the tracker once over a list of frames. Returns (results, scale)."""
+        if self.use_cuda:
+            source, scale = self._to_batch_tensor(frames, gpu_rgb)
+        else:
+            source, scale = frames, (1.0, 1.0)
+        # conf=0.25 is a good balance for balls
+        results = self.model.track(source, persist=True, verbose=False, conf=0.25)
+        return results, scale
+
+    def _open_gpu_decoder(self, video_path):
+        """Returns a decord NVDEC reader that yields CUDA tensors, or None to use OpenCV"""
+        if decord is None or not self.use_cuda: return None
+        try:
+            decord.bridge.set_bridge('torch')
+            return decord.VideoReader(video_path, ctx=decord.gpu(0))
+        except Exception as e:
+            print(f"⚠️ NVDEC decoding unavailable ({e}). Using OpenCV.")
+            return None
 
     def run_tracking(self, video_path, start_seconds=0):
-        self.load_model()
-        
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        
-        # Seek to start time
-        cap.set(cv2.CAP_PROP_POS_MSEC, start_seconds * 1000)
-        
-        print(f"⚡ Starting Video at {start_seconds}s...")
+        """Decode -> inference -> display pipeline.
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret: break
-            
-            # 1. AI PREDICTION
-            # conf=0.25 is a good balance for balls
-            results = self.model.track(frame, persist=True, verbose=False, conf=0.25)
-            
-            # 2. FIND BALL
-            ball_center = None
-            
-            if results[0].boxes.id is not None:
-                boxes = results[0].boxes.xyxy.cpu().numpy()
-                classes = results[0].boxes.cls.cpu().numpy()
-                
-                for box, cls in zip(boxes, classes):
-                    # Class 32 = Sports Ball (COCO Dataset)
-                    if int(cls) == 32:
-                        x1, y1, x2, y2 = map(int, box)
-                        ball_center = (int((x1+x2)/2), int((y1+y2)/2))
-                        
-                        # Draw Box around ball
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
-                        break # Only track one ball
-
-            # 3. UPDATE TRACE (The "Comet Tail")
-            if ball_center:
-                self.ball_trace.append(ball_center)
-            else:
-                # If ball is lost briefly, we don't clear the trace immediately
-                # but if lost for long, we might want to break the line.
-                pass 
-
-            # 4. DRAW TRACE
-            for i in range(1, len(self.ball_trace)):
-                if self.ball_trace[i-1] is None or self.ball_trace[i] is None:
-                    continue
-                
-                # Thickness fades out (Oldest points are thin, newest are thick)
-                thickness = int(np.sqrt(64 / float(len(self.ball_trace) - i + 1)) * 2)
-                cv2.line(frame, self.ball_trace[i-1], self.ball_trace[i], (0, 0, 255), thickness)
-
-            # 5. DISPLAY
-            # Add timecode
-            current_time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
-            cv2.putText(frame, f"Time: {current_time:.1f}s", (20, 40), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            cv2.putText(frame, "PRESS 'Q' TO STOP", (20, 80), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
+        A reader thread decodes batches into read_q and an inference thread
+        fills write_q, so decode and imshow overlap with GPU inference.
+        Tracker state (ball_trace) is only touched by the inference thread;
+        HighGUI windows belong to the thread that creates them, so display
+        stays on the calling thread.
+        """
+        self.load_model(calib_video=video_path)
+
+        read_q = queue.Queue(maxsize=PREFETCH_BATCHES)
+        write_q = queue.Queue(maxsize=QUEUE_SIZE)
+        stop = threading.Event()
+
+        vr = self._open_gpu_decoder(video_path)
+        if vr is not None:
+            cap = None
+            fps = vr.get_avg_fps() or 30.0
+            start_frame = int(start_seconds * fps)
+
+            def reader():
+                for first in range(start_frame, len(vr), self.batch_size):
+                    if stop.is_set(): return
+                    # (N, H, W, 3) RGB uint8, already on the GPU
+                    gpu_rgb = vr.get_batch(list(range(first, min(first + self.batch_size, len(vr)))))
+                    # One device->host copy per batch for the BGR frames we draw on
+                    frames = list(gpu_rgb.flip(-1).cpu().numpy())
+                    if not _put(read_q, (frames, gpu_rgb), stop): return
+                _put(read_q, None, stop) # EOF
+        else:
+            cap = open_capture(video_path)
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+            # Seek to start time (by frame index, exact and cheaper than a POS_MSEC seek)
+            start_frame = int(start_seconds * fps)
+            if start_frame > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+                actual = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+                if abs(actual - start_frame) > 1:
+                    print(f"⚠️ Seek landed on frame {actual}, expected {start_frame}.")
+
+            def reader():
+                while not stop.is_set():
+                    frames = []
+                    while len(frames) < self.batch_size:
+                        ret, frame = cap.read()
+                        if not ret: break
+                        frames.append(frame)
+                    if frames and not _put(read_q, (frames, None), stop): return
+                    if len(frames) < self.batch_size: break
+                _put(read_q, None, stop) # EOF
+
+        print(f"⚡ Starting Video at {start_seconds}s (batch={self.batch_size}, "
+              f"decoder={'NVDEC' if vr is not None else 'OpenCV'})...")
+
+        errors = []
+
+        def infer():
+            frame_idx = 0
+            try:
+                while not stop.is_set():
+                    # 1. NEXT DECODED BATCH
+                    item = _get(read_q, stop)
+                    if item is None: break
+                    frames, gpu_rgb = item
+
+                    # 2. AI PREDICTION (one call for the whole batch)
+                    results, (sx, sy) = self._track_batch(frames, gpu_rgb)
+                    balls = self._select_balls(results)
 
-            cv2.imshow("AI Ball Tracker (Max Level)", frame)
+                    for frame, ball in zip(frames, balls):
+                        self._annotate_frame(frame, ball, sx, sy, start_seconds + frame_idx / fps)
+                        frame_idx += 1
+                        if not _put(write_q, frame, stop): return
+            except BaseException as e:
+                errors.append(e)
+                stop.set() # Unblock the reader and the display
+            finally:
+                _put(write_q, None, stop) # Let the display drain what is left
+
+        threads = [threading.Thread(target=reader, daemon=True),
+                   threading.Thread(target=infer, daemon=True)]
+        for t in threads: t.start()
+
+        try:
+            while True:
+                frame = _get(write_q, stop)
+                if frame is None: break
+                cv2.imshow(WINDOW_NAME, frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+        finally:
+            stop.set() # Quit, an error or a finished run: stop whatever is still working
+            for t in threads: t.join()
+            if cap is not None: cap.release()
+            cv2.destroyAllWindows()
+        if errors:
+            raise errors[0]
+
+    def _select_balls(self, results):
+        """Picks the first tracked ball box of each result, returning (x1, y1, x2, y2) or None per frame.
+
+        Selection stays on the device (mask + argmax, no data-dependent shapes),
+        and the whole batch comes back in one non-blocking copy into pinned
+        memory. A CUDA event marks that copy, so the host only waits once per
+        batch, right before drawing, instead of syncing on every frame's boxes.
+        """
+        rows, slots = [], []
+        for result in results:
+            boxes = result.boxes
+            if boxes.id is None or len(boxes) == 0:
+                slots.append(None)
+                continue
+            is_ball = boxes.cls == BALL_CLASS
+            first = is_ball.to(torch.uint8).argmax()
+            # (x1, y1, x2, y2, found)
+            rows.append(torch.cat((boxes.xyxy[first], is_ball.any().to(boxes.xyxy.dtype).view(1))))
+            slots.append(len(rows) - 1)
+        if not rows:
+            return [None] * len(results)
+
+        packed = torch.stack(rows)
+        if packed.is_cuda:
+            host = torch.empty(packed.shape, dtype=packed.dtype, pin_memory=True)
+            host.copy_(packed, non_blocking=True)
+            ready = torch.cuda.Event()
+            ready.record()
+            ready.synchronize()
+            packed = host
+        packed = packed.tolist()
+
+        balls = []
+        for slot in slots:
+            row = packed[slot] if slot is not None else None
+            balls.append(tuple(row[:4]) if row and row[4] else None)
+        return balls
+
+    def _annotate_frame(self, frame, ball, sx, sy, current_time):
+        """Draws ball box, trace and HUD for one tracked frame"""
+        # 3. DRAW BALL
+        ball_center = None
+        
+        if ball is not None:
+            bx1, by1, bx2, by2 = ball
+            x1, y1, x2, y2 = int(bx1 * sx), int(by1 * sy), int(bx2 * sx), int(by2 * sy)
+            ball_center = (int((x1+x2)/2), int((y1+y2)/2))
             
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            # Draw Box around ball
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 255), 2)
+
+        # 4. UPDATE TRACE (The "Comet Tail")
+        if ball_center:
+            self.ball_trace.append(ball_center)
+        else:
+            # If ball is lost briefly, we don't clear the trace immediately
+            # but if lost for long, we might want to break the line.
+            pass 
+
+        # 5. DRAW TRACE
+        self._draw_trace(frame)
+
+        # 6. HUD
+        # Add timecode
+        cv2.putText(frame, f"Time: {current_time:.1f}s", (20, 40), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
         
-        cap.release()
-        cv2.destroyAllWindows()
+        cv2.putText(frame, "PRESS 'Q' TO STOP", (20, 80), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
+
+    @staticmethod
+    def _build_trace_runs(maxlen):
+        """Precomputes, for every trace length n, the (first_pt, last_pt, thickness) polyline runs.
+
+        Segment j joins pts[j] -> pts[j+1] and fades out with its age k = n - j
+        (Oldest points are thin, newest are thick). Thickness is monotonic in k,
+        so equal values form contiguous runs.
+        """
+        thick = [int((64.0 / k) ** 0.5 * 2) for k in range(1, maxlen + 1)] # LUT indexed by k - 1
+        runs = [[] for _ in range(maxlen + 1)]
+        for n in range(2, maxlen + 1):
+            seg = [thick[n - j - 1] for j in range(n - 1)]
+            a = 0
+            for j in range(1, n):
+                if j == n - 1 or seg[j] != seg[j - 1]:
+                    runs[n].append((a, j, seg[a])) # Segments a..j-1, i.e. points a..j
+                    a = j
+        return runs
+
+    def _draw_trace(self, frame):
+        """Draws the comet tail with one cv2.polylines call per thickness run"""
+        n = len(self.ball_trace)
+        if n < 2: return
+
+        pts = np.array(self.ball_trace, dtype=np.int32).reshape(-1, 1, 2)
+        for a, b, thickness in self._trace_runs[n]:
+            cv2.polylines(frame, [pts[a:b + 1]], False, (0, 0, 255), thickness)
 
 # ================= GUI STUDIO =================
 class FootballStudio:
@@ -112,6 +449,7 @@ class FootballStudio:
         
         self.video_path = "match.mp4" # DEFAULT VIDEO
         self.ai_tracker = AI_Tracker()
+        self._canvas_img_id = None # Snapshot canvas item, reused across snapshots
         
         self._setup_ui()
 
@@ -178,10 +516,15 @@ class FootballStudio:
         ret, frame = cap.read()
         cap.release()
         if ret:
-            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            self.pil_image = Image.fromarray(frame)
-            self.tk_image = ImageTk.PhotoImage(self.pil_image)
-            self.canvas.create_image(0, 0, image=self.tk_image, anchor=tk.NW)
+            # Hand Tk a raw PPM (header + RGB bytes) it decodes natively, no PIL round-trip
+            h, w = frame.shape[:2]
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            ppm = f"P6\n{w} {h}\n255\n".encode() + rgb.tobytes()
+            self.tk_image = tk.PhotoImage(width=w, height=h, data=ppm, format="PPM")
+            if self._canvas_img_id is None:
+                self._canvas_img_id = self.canvas.create_image(0, 0, image=self.tk_image, anchor=tk.NW)
+            else:
+                self.canvas.itemconfig(self._canvas_img_id, image=self.tk_image)
 
 def main():
     # Fix for high-DPI displays (Windows)
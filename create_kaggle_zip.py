@@ -1,24 +1,114 @@
 import zipfile
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from isal import isal_zlib as zlib # SIMD-accelerated deflate, same API
+except ImportError:
+    import zlib
+
+COMPRESS_LEVEL = 1 # Fast deflate; these archives are uploaded once and thrown away
+WINDOW = 4 * (os.cpu_count() or 1) # Files compressed ahead of the writer
+MAX_WINDOW_BYTES = 256 * 1024 * 1024 # Cap on raw + deflated bytes held in memory per window
+LARGE_FILE_BYTES = 64 * 1024 * 1024 # Bigger files are streamed by zipfile itself instead
+
+class _Precompressed:
+    """Compressor stand-in that hands zipfile bytes we already deflated"""
+    def __init__(self, payload):
+        self.payload = payload
+
+    def compress(self, data):
+        out, self.payload = self.payload, b""
+        return out
+
+    def flush(self):
+        return b""
+
+def _deflate_file(file_path):
+    with open(file_path, "rb") as f:
+        data = f.read()
+    co = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15) # Raw deflate stream, as zip expects
+    return data, co.compress(data) + co.flush()
+
+def _write_precompressed(zipf, zinfo, data, deflated):
+    """
+    Writes an entry whose deflate stream was produced ahead of time.
+    Relies on the private zipfile._get_compressor hook (CPython 3.3+), swapped
+    only for the duration of one writestr call from the writer thread. If the
+    hook is missing, the entry is written normally and compressed again.
+    """
+    if not hasattr(zipfile, "_get_compressor"):
+        zipf.writestr(zinfo, data, compresslevel=COMPRESS_LEVEL)
+        return
+    # zipfile still computes CRC and sizes from `data`, only the deflate step is skipped
+    original = zipfile._get_compressor
+    zipfile._get_compressor = lambda *args, **kwargs: _Precompressed(deflated)
+    try:
+        zipf.writestr(zinfo, data)
+    finally:
+        zipfile._get_compressor = original
+
+def _windows(entries):
+    """Yields (entries, streamed): runs of small files bounded by count and bytes, large files alone"""
+    window, window_bytes = [], 0
+    for file_path, arcname in entries:
+        size = os.path.getsize(file_path)
+        if size > LARGE_FILE_BYTES:
+            if window:
+                yield window, False
+                window, window_bytes = [], 0
+            yield [(file_path, arcname)], True
+            continue
+        # Raw data and its deflate stream are both held until the window is written
+        if window and (len(window) >= WINDOW or window_bytes + 2 * size > MAX_WINDOW_BYTES):
+            yield window, False
+            window, window_bytes = [], 0
+        window.append((file_path, arcname))
+        window_bytes += 2 * size
+    if window:
+        yield window, False
+
+def write_deflated_entries(zipf, entries, verbose=False):
+    """
+    Writes (file_path, arcname) pairs into an open ZipFile.
+    Deflate runs on a thread pool (zlib releases the GIL); entries are
+    still appended to the archive sequentially and in order. Files above
+    LARGE_FILE_BYTES go through zipf.write so they are streamed, not loaded.
+    """
+    with ThreadPoolExecutor() as ex:
+        for window, streamed in _windows(entries):
+            if streamed:
+                file_path, arcname = window[0]
+                if verbose:
+                    print(f"Adding: {arcname}")
+                zipf.write(file_path, arcname, compress_type=zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL)
+                continue
+            for (file_path, arcname), (data, deflated) in zip(window, ex.map(_deflate_file, [p for p, _ in window])):
+                if verbose:
+                    print(f"Adding: {arcname}")
+                zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                _write_precompressed(zipf, zinfo, data, deflated)
 
 def zip_folder(folder_path, output_path):
     print(f"Zipping '{folder_path}' to '{output_path}'...")
     try:
+        entries = []
+        for root, dirs, files in os.walk(folder_path):
+            for file in files:
+                # Get the full file path
+                file_path = os.path.join(root, file)
+
+                # Create a relative path for the archive (e.g., python/api.py)
+                # We want the 'python' folder to be the root inside the zip
+                arcname = os.path.relpath(file_path, os.path.dirname(os.path.abspath(folder_path)))
+
+                # CRITICAL: Force forward slashes for Linux/Kaggle compatibility
+                arcname = arcname.replace(os.sep, '/')
+                entries.append((file_path, arcname))
+
         with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    # Get the full file path
-                    file_path = os.path.join(root, file)
-                    
-                    # Create a relative path for the archive (e.g., python/api.py)
-                    # We want the 'python' folder to be the root inside the zip
-                    arcname = os.path.relpath(file_path, os.path.dirname(os.path.abspath(folder_path)))
-                    
-                    # CRITICAL: Force forward slashes for Linux/Kaggle compatibility
-                    arcname = arcname.replace(os.sep, '/')
-                    
-                    print(f"Adding: {arcname}")
-                    zipf.write(file_path, arcname)
+            write_deflated_entries(zipf, entries, verbose=True)
         print(f"✅ Successfully created {output_path}")
     except Exception as e:
         print(f"❌ Error creating zip: {e}")
@@ -1,10 +1,18 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
 CONFIG_FILE = "crop_config.json"
 ASSETS_DIR = "extracted_assets"
 OUTPUT_DIR = "recreated_assets"
+PNG_COMPRESS_LEVEL = 1 # ~3x faster encode for ~15% larger files
+
+def _save_crop(job):
+    cropped_img, output_path = job
+    # Pillow releases the GIL while deflating, so saves overlap across threads
+    cropped_img.save(output_path, optimize=False, compress_level=PNG_COMPRESS_LEVEL)
+    return output_path
 
 def crop_images():
     if not os.path.exists(OUTPUT_DIR):
@@ -22,8 +30,11 @@ def crop_images():
             print(f"Source image not found: {src_path}")
             continue
 
+        # Decode the source once up front so the worker threads only encode
         img = Image.open(src_path)
+        img.load()
 
+        jobs = []
         for crop in slide["crops"]:
             bbox = tuple(crop["bbox"])
             crop_name = crop["name"]
@@ -32,9 +43,11 @@ def crop_images():
             
             output_filename = f"slide_{page_num}_{crop_name}.png"
             output_path = os.path.join(OUTPUT_DIR, output_filename)
-            
-            cropped_img.save(output_path)
-            print(f"Saved {output_path}")
+            jobs.append((cropped_img, output_path))
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            for output_path in ex.map(_save_crop, jobs):
+                print(f"Saved {output_path}")
 
 if __name__ == "__main__":
     crop_images()
@@ -1,4 +1,5 @@
 from PIL import Image
+import numpy as np
 import sys
 
 def find_content_bbox(image_path, threshold=240):
@@ -11,59 +12,20 @@ def find_content_bbox(image_path, threshold=240):
         width, height = img.size
         print(f"Analyzing {image_path} ({width}x{height})")
 
-        left, top, right, bottom = width, height, 0, 0
-        found = False
+        # Content mask: any channel darker than the threshold
+        arr = np.asarray(img, dtype=np.uint8)
+        mask = (arr < threshold).any(axis=2)
+        rows = mask.any(axis=1)
+        cols = mask.any(axis=0)
 
-        # Load pixels
-        pixels = img.load()
-
-        # Simplify: Scan rows and columns to find limits
-        # Top
-        for y in range(height):
-            for x in range(width):
-                r, g, b = pixels[x, y]
-                if r < threshold or g < threshold or b < threshold:
-                    top = y
-                    found = True
-                    break
-            if found: break
-        
-        if not found:
+        if not rows.any():
             print("No content found (image is all white/light).")
             return
 
-        # Bottom
-        found = False
-        for y in range(height - 1, -1, -1):
-            for x in range(width):
-                r, g, b = pixels[x, y]
-                if r < threshold or g < threshold or b < threshold:
-                    bottom = y
-                    found = True
-                    break
-            if found: break
-
-        # Left
-        found = False
-        for x in range(width):
-            for y in range(top, bottom + 1):
-                r, g, b = pixels[x, y]
-                if r < threshold or g < threshold or b < threshold:
-                    left = x
-                    found = True
-                    break
-            if found: break
-
-        # Right
-        found = False
-        for x in range(width - 1, -1, -1):
-            for y in range(top, bottom + 1):
-                r, g, b = pixels[x, y]
-                if r < threshold or g < threshold or b < threshold:
-                    right = x
-                    found = True
-                    break
-            if found: break
+        top = int(rows.argmax())
+        bottom = len(rows) - 1 - int(rows[::-1].argmax())
+        left = int(cols.argmax())
+        right = len(cols) - 1 - int(cols[::-1].argmax())
 
         print(f"Content BBox: ({left}, {top}, {right}, {bottom})")
         print(f"Width: {right - left}, Height: {bottom - top}")
@@ -72,22 +34,16 @@ def find_content_bbox(image_path, threshold=240):
         # Assuming the image is on the right half
         mid_x = width // 2
         print(f"\nScanning right half (x > {mid_x})...")
-        
-        r_left, r_top, r_right, r_bottom = width, height, mid_x, 0
-        r_found = False
 
-        # Scan right half
-        for y in range(height):
-            for x in range(mid_x, width):
-                r, g, b = pixels[x, y]
-                if r < threshold or g < threshold or b < threshold:
-                    if x < r_left: r_left = x
-                    if x > r_right: r_right = x
-                    if y < r_top: r_top = y
-                    if y > r_bottom: r_bottom = y
-                    r_found = True
-        
-        if r_found:
+        right_mask = mask[:, mid_x:]
+        r_rows = right_mask.any(axis=1)
+        r_cols = right_mask.any(axis=0)
+
+        if r_rows.any():
+            r_top = int(r_rows.argmax())
+            r_bottom = len(r_rows) - 1 - int(r_rows[::-1].argmax())
+            r_left = mid_x + int(r_cols.argmax())
+            r_right = mid_x + len(r_cols) - 1 - int(r_cols[::-1].argmax())
             print(f"Right Side Blob BBox: ({r_left}, {r_top}, {r_right}, {r_bottom})")
 
     except Exception as e:
@@ -1,5 +1,6 @@
 import fitz  # PyMuPDF
-import json
+import hashlib
+import orjson
 import os
 
 # Configuration
@@ -26,10 +27,13 @@ def extract_content():
             "images": []
         }
 
-        # Extract text blocks
-        # "dict" returns a dictionary with detailed information
+        # One content-stream parse per page: "dict" returns text spans and
+        # image blocks (with their raw bytes and placement bbox) together
         blocks = page.get_text("dict")["blocks"]
-        
+        # Image blocks are placements and carry no xref; an image placed several times
+        # yields identical bytes, so those key it to write it once with all its rects
+        page_images = {}
+
         for b in blocks:
             if b["type"] == 0:  # Text block
                 for line in b["lines"]:
@@ -44,42 +48,33 @@ def extract_content():
                         }
                         slide["text_blocks"].append(text_item)
 
-        # Extract images
-        image_list = page.get_images(full=True)
-        
-        for img_index, img in enumerate(image_list):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            image_ext = base_image["ext"]
-            
-            image_filename = f"slide_{page_num + 1}_img_{img_index + 1}.{image_ext}"
-            image_path = os.path.join(OUTPUT_DIR, image_filename)
-            
-            with open(image_path, "wb") as f:
-                f.write(image_bytes)
-            
-            # Get image bbox on page (this can be tricky, simplified here)
-            # PyMuPDF doesn't give bbox in get_images directly, we need to search for it
-            # or just list it as an asset belonging to the slide.
-            # For accurate positioning, we would need to search for the image on the page
-            # using page.get_image_rects(xref)
-            
-            rects = page.get_image_rects(xref)
-            bboxes = [list(r) for r in rects]
+            elif b["type"] == 1:  # Image block
+                key = hashlib.blake2b(b["image"], digest_size=16).digest()
+                image = page_images.get(key)
+                if image is not None:
+                    image["bboxes"].append(list(b["bbox"]))
+                    continue
+
+                image_filename = f"slide_{page_num + 1}_img_{len(page_images) + 1}.{b['ext']}"
+                image_path = os.path.join(OUTPUT_DIR, image_filename)
+
+                with open(image_path, "wb") as f:
+                    f.write(b["image"])
 
-            slide["images"].append({
-                "filename": image_filename,
-                "path": image_path,
-                "bboxes": bboxes
-            })
+                image = page_images[key] = {
+                    "filename": image_filename,
+                    "path": image_path,
+                    "bboxes": [list(b["bbox"])]
+                }
+                slide["images"].append(image)
 
         presentation_data["slides"].append(slide)
         print(f"Processed slide {page_num + 1}")
 
     # Save structured data to JSON
-    with open(JSON_OUTPUT, "w", encoding="utf-8") as f:
-        json.dump(presentation_data, f, indent=2, ensure_ascii=False)
+    # orjson writes UTF-8 without escaping, like ensure_ascii=False
+    with open(JSON_OUTPUT, "wb") as f:
+        f.write(orjson.dumps(presentation_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     print(f"Extraction complete. JSON saved to {JSON_OUTPUT}")
 
@@ -1,25 +1,41 @@
 import fitz
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 PDF_PATH = "Analyst_Crisis_TACTA_Solution.pdf"
 OUTPUT_DIR = "reference_slides"
+JPEG_QUALITY = 92 # References are only read by eye, so lossy is fine and far faster than PNG
+
+# Each worker process opens the PDF once (fitz documents can't be pickled)
+_worker_doc = None
+
+def _open_worker_doc(pdf_path):
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+def _render_page(page_num):
+    # Render the page to an image (pixmap) instead of extracting embedded images
+    # This ensures we get exactly what the slide looks like (text included)
+    pix = _worker_doc[page_num].get_pixmap(matrix=fitz.Matrix(1, 1)) # Standard resolution is fine for reading text
+
+    output_filename = f"slide_{page_num + 1}_ref.jpg"
+    output_path = os.path.join(OUTPUT_DIR, output_filename)
+
+    pix.save(output_path, jpg_quality=JPEG_QUALITY)
+    return output_path
 
 def extract_reference():
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
 
-    doc = fitz.open(PDF_PATH)
-    
-    for page_num, page in enumerate(doc):
-        # Render the page to an image (pixmap) instead of extracting embedded images
-        # This ensures we get exactly what the slide looks like (text included)
-        pix = page.get_pixmap(matrix=fitz.Matrix(1, 1)) # Standard resolution is fine for reading text
-        
-        output_filename = f"slide_{page_num + 1}_ref.png"
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
-        
-        pix.save(output_path)
-        print(f"Saved reference {output_path}")
+    with fitz.open(PDF_PATH) as doc:
+        page_count = len(doc)
+
+    # Pages render and JPEG-encode independently, so spread them across cores
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_open_worker_doc,
+                             initargs=(PDF_PATH,)) as ex:
+        for output_path in ex.map(_render_page, range(page_count)):
+            print(f"Saved reference {output_path}")
 
 if __name__ == "__main__":
     extract_reference()
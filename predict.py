@@ -1,5 +1,5 @@
 import os
-import json
+import orjson
 import tempfile
 from pathlib import Path
 from cog import BasePredictor, Input, Path as CogPath
@@ -13,15 +13,11 @@ from soccer_analysis_core import logger
 import numpy as np
 
 
-class NumpyEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, np.integer):
-            return int(obj)
-        if isinstance(obj, np.floating):
-            return float(obj)
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        return super(NumpyEncoder, self).default(obj)
+def _numpy_default(obj):
+    """orjson fallback for numpy values it can't serialize natively (e.g. non-contiguous arrays)"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 
 class Predictor(BasePredictor):
@@ -60,7 +56,10 @@ class Predictor(BasePredictor):
             generate_annotated_video=generate_video
         )
         
-        # Convert numpy types for JSON serialization
-        results_json = json.loads(json.dumps(results, cls=NumpyEncoder))
+        # Convert numpy types for JSON serialization (orjson handles arrays/scalars in C)
+        results_json = orjson.loads(orjson.dumps(
+            results, default=_numpy_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ))
         
         return results_json
@@ -1,32 +1,43 @@
 import zipfile
 import os
 from pathlib import Path
+from create_kaggle_zip import write_deflated_entries
+
+def _iter_files(root):
+    """Yields file paths under root, pruning __pycache__ before descending"""
+    with os.scandir(root) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name == "__pycache__":
+                    continue
+                yield from _iter_files(entry.path)
+            elif entry.is_file() and not entry.name.endswith(".pyc"):
+                yield entry.path
 
 def create_colab_package():
     output_filename = "colab_package.zip"
     source_dir = Path("python")
-    
-    with zipfile.ZipFile(output_filename, "w", zipfile.ZIP_DEFLATED) as zipf:
-        # Add python directory
-        for root, dirs, files in os.walk(source_dir):
+    entries = []
+
+    # Add python directory
+    for file_path in _iter_files(source_dir):
+        entries.append((file_path, file_path))
+
+    # Add requirements.txt if it exists outside
+    if os.path.exists("requirements.txt"):
+         entries.append(("requirements.txt", "requirements.txt"))
+
+    # Add models if they exist (optional, usually downloaded)
+    # But here we assume models are downloaded by the script or in the repo
+    # If 'models' dir exists, add it
+    if os.path.exists("models"):
+         for root, dirs, files in os.walk("models"):
             for file in files:
-                if file == "__pycache__" or file.endswith(".pyc"):
-                    continue
                 file_path = os.path.join(root, file)
-                zipf.write(file_path, file_path)
-        
-        # Add requirements.txt if it exists outside
-        if os.path.exists("requirements.txt"):
-             zipf.write("requirements.txt", "requirements.txt")
-             
-        # Add models if they exist (optional, usually downloaded)
-        # But here we assume models are downloaded by the script or in the repo
-        # If 'models' dir exists, add it
-        if os.path.exists("models"):
-             for root, dirs, files in os.walk("models"):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    zipf.write(file_path, file_path)
+                entries.append((file_path, file_path))
+
+    with zipfile.ZipFile(output_filename, "w", zipfile.ZIP_DEFLATED) as zipf:
+        write_deflated_entries(zipf, entries)
 
     print(f"Created {output_filename}. Upload this file to Google Colab.")
 
@@ -4,13 +4,97 @@ Advanced Analysis Engines
 Passing Prediction and Tactical Event Detection
 """
 
+import os
+import multiprocessing
+import threading
 import numpy as np
 from typing import Dict, List, Tuple, Optional
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
+from itertools import chain
+from scipy.spatial import cKDTree
 
 from soccer_analysis_core import TrackPoint, logger
 
+# Below this many points a broadcast distance matrix beats building a KD-tree
+# (a normal 22-player frame stays on the brute-force path)
+KDTREE_MIN_POINTS = 64
+CARRIER_RADIUS2 = 2.0 ** 2  # Squared radii, compared against squared distances
+PRESSURE_RADIUS2 = 5.0 ** 2
+
+# Frames are independent, so long matches are split across processes. Below this
+# many frames, pickling the frames costs more than it saves
+PARALLEL_MIN_FRAMES = 2000
+CHUNKS_PER_WORKER = 4
+
+# event_type -> seconds before the same team can raise it again
+ALERT_DEBOUNCE = {'counter_attack': 3.0, 'high_press': 5.0}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _frame_pool() -> ProcessPoolExecutor:
+    """
+    Worker pool shared by every engine, started on first use. Workers are spawned, not forked:
+    callers live in threaded servers that may already hold a CUDA context, which fork can't copy.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _map_frame_chunks(fn, items: list) -> list:
+    """
+    Applies fn to contiguous chunks of per-frame items and concatenates the results in order.
+    fn must be a module-level function or staticmethod, so only the items are pickled.
+    """
+    global _pool
+    if len(items) < PARALLEL_MIN_FRAMES or multiprocessing.current_process().daemon:
+        return fn(items)  # Daemon processes (e.g. pool workers) can't start children
+    
+    pool = _frame_pool()
+    size = -(-len(items) // ((os.cpu_count() or 1) * CHUNKS_PER_WORKER))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    try:
+        return list(chain.from_iterable(pool.map(fn, chunks)))
+    except BrokenProcessPool:
+        logger.warning("Frame worker pool died; running this batch in-process")
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return fn(items)
+
+
+@dataclass
+class FrameTable:
+    """One frame's positioned players as parallel arrays (one row per player)"""
+    ids: np.ndarray
+    xy: np.ndarray  # (N, 2) smoothed pitch position in meters
+    vel: np.ndarray
+    team: np.ndarray
+    is_sprint: np.ndarray
+    points: List[TrackPoint]  # Source points, row-aligned with the arrays
+    
+    @classmethod
+    def from_players(cls, players: List[Tuple[int, TrackPoint]]) -> 'FrameTable':
+        """Builds the table from (pid, TrackPoint) pairs, skipping players without a position"""
+        located = [(pid, p) for pid, p in players if p.xm_smooth is not None]
+        points = [p for _, p in located]
+        return cls(
+            ids=np.array([pid for pid, _ in located]),
+            xy=np.array([(p.xm_smooth, p.ym_smooth) for p in points], dtype=np.float64).reshape(-1, 2),
+            vel=np.array([p.velocity for p in points], dtype=np.float64),
+            team=np.array([p.team for p in points], dtype=str),
+            is_sprint=np.array([p.is_sprinting for p in points], dtype=bool),
+            points=points
+        )
+
 
 @dataclass
 class PassingPrediction:
@@ -56,120 +140,121 @@ class PassingEngine:
            - Receiver velocity (moving into space = higher)
            - Defensive pressure (fewer defenders nearby = higher)
         """
-        predictions = []
+        if not ball_track:
+            return []
+        
+        # Ball position per frame (reversed so the first point of a frame wins, as before)
+        ball_by_frame = {b.frame: b for b in reversed(ball_track)}
         
+        items = []
         for frame, players in frames_data.items():
-            if not ball_track:
-                continue
-            
             # Find ball position for this frame
-            ball_pos = next((b for b in ball_track if b.frame == frame), None)
+            ball_pos = ball_by_frame.get(frame)
             if not ball_pos or ball_pos.xm_smooth is None:
                 continue
+            items.append((frame, players, ball_pos))
+        
+        return _map_frame_chunks(PassingEngine._predict_chunk, items)
+    
+    @staticmethod
+    def _predict_chunk(items: List[Tuple[int, List[Tuple[int, TrackPoint]], TrackPoint]]) -> List[PassingPrediction]:
+        """Passing predictions for a run of (frame, players, ball_pos) items"""
+        predictions = []
+        
+        for frame, players, ball_pos in items:
+            # Positioned players as parallel arrays (one row per player)
+            table = FrameTable.from_players([(pid, p) for pid, p in players if p.team != "BALL"])
+            if len(table.ids) == 0:
+                continue
+            ball_xy = np.array([ball_pos.xm_smooth, ball_pos.ym_smooth], dtype=np.float64)
             
             # Find ball carrier (closest player to ball)
-            carrier_id, carrier = self._find_ball_carrier(players, ball_pos)
-            if carrier_id is None:
+            c = PassingEngine._find_ball_carrier(table.xy, ball_xy)
+            if c is None:
                 continue
+            carrier_id = table.ids[c].item()
             
             # Get teammates
-            teammates = [(pid, p) for pid, p in players 
-                        if p.team == carrier.team and pid != carrier_id]
-            
-            if not teammates:
+            receivers = np.flatnonzero(table.team == table.team[c])
+            receivers = receivers[receivers != c]
+            if len(receivers) == 0:
                 continue
             
+            # Opponent positions are shared by every receiver this frame
+            opp_xy = table.xy[table.team != table.team[c]]
+            
             # Calculate pass probabilities
-            for receiver_id, receiver in teammates:
-                if receiver.xm_smooth is None:
-                    continue
-                
-                prob = self._calculate_pass_probability(
-                    carrier, receiver, players, ball_pos
-                )
-                
-                if prob > 0.3:  # Only include likely passes
-                    distance = np.sqrt(
-                        (receiver.xm_smooth - ball_pos.xm_smooth)**2 +
-                        (receiver.ym_smooth - ball_pos.ym_smooth)**2
-                    )
-                    
-                    predictions.append(PassingPrediction(
-                        frame=frame,
-                        timestamp=ball_pos.timestamp,
-                        ball_carrier_id=carrier_id,
-                        receiver_id=receiver_id,
-                        probability=round(prob, 3),
-                        distance=round(distance, 2),
-                        receiver_position=(receiver.xm_smooth, receiver.ym_smooth)
-                    ))
+            prob, distance = PassingEngine._calculate_pass_probabilities(
+                c, receivers, table.xy, table.vel, opp_xy, ball_xy
+            )
+            
+            for i in np.flatnonzero(prob > 0.3):  # Only include likely passes
+                receiver_id = table.ids[receivers[i]].item()
+                receiver = table.points[receivers[i]]
+                predictions.append(PassingPrediction(
+                    frame=frame,
+                    timestamp=ball_pos.timestamp,
+                    ball_carrier_id=carrier_id,
+                    receiver_id=receiver_id,
+                    probability=round(float(prob[i]), 3),
+                    distance=round(float(distance[i]), 2),
+                    receiver_position=(receiver.xm_smooth, receiver.ym_smooth)
+                ))
         
         return predictions
     
-    def _find_ball_carrier(self, players: List[Tuple[int, TrackPoint]], 
-                          ball: TrackPoint) -> Tuple[Optional[int], Optional[TrackPoint]]:
-        """Find player closest to ball"""
-        min_dist = float('inf')
-        carrier_id = None
-        carrier = None
+    @staticmethod
+    def _find_ball_carrier(xy: np.ndarray, ball_xy: np.ndarray) -> Optional[int]:
+        """Row index of the player closest to the ball, if within 2m"""
+        if len(xy) >= KDTREE_MIN_POINTS:
+            dist, i = cKDTree(xy).query(ball_xy, k=1, distance_upper_bound=2.0)
+            return int(i) if dist < 2.0 else None
         
-        for pid, p in players:
-            if p.xm_smooth is None or p.team == "BALL":
-                continue
-            
-            dist = np.sqrt(
-                (p.xm_smooth - ball.xm_smooth)**2 +
-                (p.ym_smooth - ball.ym_smooth)**2
-            )
-            
-            if dist < min_dist and dist < 2.0:  # Within 2m
-                min_dist = dist
-                carrier_id = pid
-                carrier = p
+        # Squared distances against the squared radius, no sqrt needed
+        d = xy - ball_xy
+        d2 = d[:, 0]**2 + d[:, 1]**2
         
-        return carrier_id, carrier
+        i = int(np.argmin(d2))  # First minimum, like a strict '<' scan
+        return i if d2[i] < CARRIER_RADIUS2 else None
     
-    def _calculate_pass_probability(self, carrier: TrackPoint, receiver: TrackPoint,
-                                    all_players: List[Tuple[int, TrackPoint]],
-                                    ball: TrackPoint) -> float:
-        """Calculate probability of pass to receiver"""
-        # Distance factor (optimal 5-20m)
-        distance = np.sqrt(
-            (receiver.xm_smooth - ball.xm_smooth)**2 +
-            (receiver.ym_smooth - ball.ym_smooth)**2
-        )
+    @staticmethod
+    def _calculate_pass_probabilities(carrier: int, receivers: np.ndarray,
+                                      xy: np.ndarray, vel: np.ndarray, opp_xy: np.ndarray,
+                                      ball_xy: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculate probability of pass to each receiver row. Returns (probability, distance)"""
+        rxy = xy[receivers]
         
-        if distance < 3 or distance > 40:
-            return 0.0
-        
-        distance_score = 1.0 - min(abs(distance - 12) / 30, 1.0)
+        # Distance factor (optimal 5-20m)
+        d = rxy - ball_xy
+        distance = np.sqrt(d[:, 0]**2 + d[:, 1]**2)
+        distance_score = 1.0 - np.minimum(np.abs(distance - 12) / 30, 1.0)
         
         # Forward pass bonus (attacking direction)
-        forward_score = 1.0
-        if receiver.xm_smooth > carrier.xm_smooth:
-            forward_score = 1.3
+        forward_score = np.where(rxy[:, 0] > xy[carrier, 0], 1.3, 1.0)
         
         # Receiver movement score (moving into space)
-        movement_score = min(receiver.velocity / 5.0, 1.0) if receiver.velocity > 0 else 0.5
-        
-        # Defensive pressure (count opponents near receiver)
-        opponents = [p for pid, p in all_players 
-                    if p.team != carrier.team and p.team != "BALL" and p.xm_smooth is not None]
+        rvel = vel[receivers]
+        movement_score = np.where(rvel > 0, np.minimum(rvel / 5.0, 1.0), 0.5)
         
-        pressure_count = sum(1 for p in opponents if np.sqrt(
-            (p.xm_smooth - receiver.xm_smooth)**2 +
-            (p.ym_smooth - receiver.ym_smooth)**2
-        ) < 5.0)
+        # Defensive pressure (count opponents within 5m of each receiver)
+        if len(opp_xy) >= KDTREE_MIN_POINTS:
+            # query_ball_point is inclusive, so shrink r by one ulp to keep '< 5.0'
+            pressure_count = cKDTree(opp_xy).query_ball_point(
+                rxy, r=np.nextafter(5.0, 0.0), return_length=True)
+        else:
+            gap = rxy[:, None, :] - opp_xy[None, :, :]
+            pressure_count = (gap[..., 0]**2 + gap[..., 1]**2 < PRESSURE_RADIUS2).sum(axis=1)
         
-        pressure_score = max(0.3, 1.0 - (pressure_count * 0.2))
+        pressure_score = np.maximum(0.3, 1.0 - (pressure_count * 0.2))
         
         # Combined probability
-        probability = (distance_score * 0.4 + 
-                      forward_score * 0.2 + 
-                      movement_score * 0.2 + 
-                      pressure_score * 0.2)
+        probability = np.minimum(distance_score * 0.4 + 
+                                 forward_score * 0.2 + 
+                                 movement_score * 0.2 + 
+                                 pressure_score * 0.2, 1.0)
+        probability[(distance < 3) | (distance > 40)] = 0.0
         
-        return min(probability, 1.0)
+        return probability, distance
 
 
 class TacticalEngine:
@@ -177,93 +262,107 @@ class TacticalEngine:
     
     def __init__(self, config):
         self.config = config
-        self.last_alerts = defaultdict(float)  # Debounce alerts
+        self.last_alerts: Dict[Tuple[str, str], float] = {}  # (event_type, team) -> last alert time
     
     def detect_events(self, frames_data: Dict[int, List[Tuple[int, TrackPoint]]]) -> List[TacticalAlert]:
         """Detect tactical events across frames"""
+        # Detection is per frame (and parallel for long matches); debouncing depends on
+        # earlier alerts, so it runs afterwards in frame order
+        candidates = _map_frame_chunks(TacticalEngine._detect_chunk, list(frames_data.items()))
+        return self._debounce(candidates)
+    
+    def _debounce(self, candidates: List[TacticalAlert]) -> List[TacticalAlert]:
+        """Drops alerts repeated within the debounce window of the same event and team"""
         alerts = []
         
-        for frame, players in frames_data.items():
-            # Separate teams
-            team_a = [(pid, p) for pid, p in players if p.team == "A" and p.xm_smooth is not None]
-            team_b = [(pid, p) for pid, p in players if p.team == "B" and p.xm_smooth is not None]
-            
-            if not team_a or not team_b:
+        for alert in candidates:
+            alert_key = (alert.event_type, alert.team)
+            if alert.timestamp - self.last_alerts.get(alert_key, -np.inf) > ALERT_DEBOUNCE[alert.event_type]:
+                self.last_alerts[alert_key] = alert.timestamp
+                alerts.append(alert)
+        
+        return alerts
+    
+    @staticmethod
+    def _detect_chunk(items: List[Tuple[int, List[Tuple[int, TrackPoint]]]]) -> List[TacticalAlert]:
+        """Undebounced alerts for a run of (frame, players) items"""
+        alerts = []
+        
+        for frame, players in items:
+            # Separate teams (one mask each, then plain per-team arrays)
+            table = FrameTable.from_players(players)
+            is_a = table.team == "A"
+            is_b = table.team == "B"
+            if not is_a.any() or not is_b.any():
                 continue
             
             timestamp = players[0][1].timestamp if players else 0
+            x = table.xy[:, 0]
+            a_x, a_vel, a_sprint, a_ids = x[is_a], table.vel[is_a], table.is_sprint[is_a], table.ids[is_a]
+            b_x, b_vel, b_sprint, b_ids = x[is_b], table.vel[is_b], table.is_sprint[is_b], table.ids[is_b]
             
             # Detect counter attacks
-            alerts.extend(self._detect_counter_attack(frame, timestamp, team_a, team_b))
-            alerts.extend(self._detect_counter_attack(frame, timestamp, team_b, team_a))
+            alerts.extend(TacticalEngine._detect_counter_attack(frame, timestamp, a_x, a_sprint, a_ids, b_x, "A"))
+            alerts.extend(TacticalEngine._detect_counter_attack(frame, timestamp, b_x, b_sprint, b_ids, a_x, "B"))
             
             # Detect high press
-            alerts.extend(self._detect_high_press(frame, timestamp, team_a, team_b))
-            alerts.extend(self._detect_high_press(frame, timestamp, team_b, team_a))
+            alerts.extend(TacticalEngine._detect_high_press(frame, timestamp, a_x, a_vel, a_ids, "A"))
+            alerts.extend(TacticalEngine._detect_high_press(frame, timestamp, b_x, b_vel, b_ids, "B"))
         
         return alerts
     
-    def _detect_counter_attack(self, frame: int, timestamp: float,
-                               attacking_team: List[Tuple[int, TrackPoint]],
-                               defending_team: List[Tuple[int, TrackPoint]]) -> List[TacticalAlert]:
+    @staticmethod
+    def _detect_counter_attack(frame: int, timestamp: float, att_x: np.ndarray, att_sprint: np.ndarray,
+                               att_ids: np.ndarray, def_x: np.ndarray, team: str) -> List[TacticalAlert]:
         """Detect counter attack: fast forward movement with numerical advantage"""
         alerts = []
         
         # Check if multiple attackers are sprinting forward
-        sprinting_attackers = [(pid, p) for pid, p in attacking_team if p.is_sprinting]
+        n_sprinting = int(np.count_nonzero(att_sprint))
         
-        if len(sprinting_attackers) < 2:
+        if n_sprinting < 2:
             return alerts
         
         # Check if they're in attacking half
-        avg_x = np.mean([p.xm_smooth for _, p in sprinting_attackers])
+        avg_x = att_x[att_sprint].mean()
         if avg_x < 52.5:  # Not in attacking half
             return alerts
         
         # Count defenders in vicinity
-        defenders_back = sum(1 for _, p in defending_team if p.xm_smooth > avg_x - 20)
+        defenders_back = int(np.count_nonzero(def_x > avg_x - 20))
         
-        if len(sprinting_attackers) > defenders_back:
-            # Debounce (don't alert within 3 seconds)
-            alert_key = f"counter_{attacking_team[0][1].team}_{frame // 90}"
-            if timestamp - self.last_alerts[alert_key] > 3.0:
-                self.last_alerts[alert_key] = timestamp
-                
-                alerts.append(TacticalAlert(
-                    frame=frame,
-                    timestamp=timestamp,
-                    event_type='counter_attack',
-                    team=attacking_team[0][1].team,
-                    severity='high',
-                    description=f"Counter attack! {len(sprinting_attackers)} vs {defenders_back}",
-                    players_involved=[pid for pid, _ in sprinting_attackers]
-                ))
+        if n_sprinting > defenders_back:
+            alerts.append(TacticalAlert(
+                frame=frame,
+                timestamp=timestamp,
+                event_type='counter_attack',
+                team=team,
+                severity='high',
+                description=f"Counter attack! {n_sprinting} vs {defenders_back}",
+                players_involved=att_ids[att_sprint].tolist()
+            ))
         
         return alerts
     
-    def _detect_high_press(self, frame: int, timestamp: float,
-                          pressing_team: List[Tuple[int, TrackPoint]],
-                          pressed_team: List[Tuple[int, TrackPoint]]) -> List[TacticalAlert]:
+    @staticmethod
+    def _detect_high_press(frame: int, timestamp: float, press_x: np.ndarray, press_vel: np.ndarray,
+                           press_ids: np.ndarray, team: str) -> List[TacticalAlert]:
         """Detect high press: multiple defenders in opponent's half"""
         alerts = []
         
         # Count pressers in opponent's defensive third
-        pressers = [(pid, p) for pid, p in pressing_team 
-                   if p.xm_smooth < 35 and p.velocity > 2.0]
+        pressers = (press_x < 35) & (press_vel > 2.0)
+        n_pressers = int(np.count_nonzero(pressers))
         
-        if len(pressers) >= 3:
-            alert_key = f"press_{pressing_team[0][1].team}_{frame // 90}"
-            if timestamp - self.last_alerts[alert_key] > 5.0:
-                self.last_alerts[alert_key] = timestamp
-                
-                alerts.append(TacticalAlert(
-                    frame=frame,
-                    timestamp=timestamp,
-                    event_type='high_press',
-                    team=pressing_team[0][1].team,
-                    severity='medium',
-                    description=f"High press with {len(pressers)} players",
-                    players_involved=[pid for pid, _ in pressers]
-                ))
+        if n_pressers >= 3:
+            alerts.append(TacticalAlert(
+                frame=frame,
+                timestamp=timestamp,
+                event_type='high_press',
+                team=team,
+                severity='medium',
+                description=f"High press with {n_pressers} players",
+                players_involved=press_ids[pressers].tolist()
+            ))
         
         return alerts
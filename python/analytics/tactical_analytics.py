@@ -1,74 +1,127 @@
+import functools
 import numpy as np
 from collections import defaultdict
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Fallback so the module still imports; kernels run as plain Python
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+PITCH_LENGTH = 105 # meters
+PITCH_WIDTH = 68
+HISTORY_WINDOW = 128 # Samples kept per track; speed windows are capped to this
+HEATMAP_GRID = (105, 68) # Full-resolution grid accumulated over the whole track (1 m cells)
+
+@njit(cache=True)
+def _speed_kernel(ring, head, window_frames, fps):
+    """km/h between the first and last of the most recent window_frames samples in a ring of (frame, x, y)"""
+    size = ring.shape[0]
+    if head < 2:
+        return 0.0
+    window_frames = min(window_frames, size)
+    first = max(head - window_frames, 0) % size
+    last = (head - 1) % size
+    if first == last:
+        return 0.0
+
+    time_sec = (ring[last, 0] - ring[first, 0]) / fps
+    if time_sec == 0:
+        return 0.0
+
+    return np.hypot(ring[last, 1] - ring[first, 1], ring[last, 2] - ring[first, 2]) / time_sec * 3.6
+
+@functools.lru_cache(maxsize=None)
+def _rebin_weights(fine, coarse, extent):
+    """(coarse, fine) share of each fine cell falling in each coarse cell, split by overlap length"""
+    fine_edges = np.linspace(0.0, extent, fine + 1)
+    coarse_edges = np.linspace(0.0, extent, coarse + 1)
+    lo = np.maximum(coarse_edges[:-1, None], fine_edges[None, :-1])
+    hi = np.minimum(coarse_edges[1:, None], fine_edges[None, 1:])
+    return (np.clip(hi - lo, 0.0, None) / (extent / fine)).astype(np.float32)
+
 class TacticalAnalytics:
     def __init__(self, fps=30):
         self.fps = fps
-        self.player_histories = defaultdict(list) # id -> list of (frame, x, y)
+        # Fixed-size ring of the last HISTORY_WINDOW (frame, x, y) rows per track
+        self.track_slots = {} # id -> row in history/heads
+        self.history = np.zeros((16, HISTORY_WINDOW, 3), dtype=np.float32)
+        self.heads = np.zeros(16, dtype=np.int64) # samples written per row
+        self.heatmaps = np.zeros((16,) + HEATMAP_GRID, dtype=np.float32) # per-slot counts, grown with history
         self.team_centroids = defaultdict(list) # frame -> (x, y)
-        
+
+    def _slot(self, track_id):
+        slot = self.track_slots.get(track_id)
+        if slot is None:
+            slot = self.track_slots[track_id] = len(self.track_slots)
+            if slot == len(self.heads):
+                # Track ids keep growing, so rows are grown by doubling
+                self.history = np.concatenate([self.history, np.zeros_like(self.history)])
+                self.heads = np.concatenate([self.heads, np.zeros_like(self.heads)])
+                self.heatmaps = np.concatenate([self.heatmaps, np.zeros_like(self.heatmaps)])
+        return slot
+
+    def _accumulate_heatmaps(self, slots, coords):
+        """Bins one frame of (x, y) rows into their slots' grids with a single scatter-add"""
+        nx, ny = HEATMAP_GRID
+        xs, ys = coords[:, 0], coords[:, 1]
+        # Same binning as np.histogram2d over the pitch: right edge inclusive, outside points (and NaN) dropped
+        inside = (xs >= 0) & (xs <= PITCH_LENGTH) & (ys >= 0) & (ys <= PITCH_WIDTH)
+        ix = np.minimum((xs[inside] * (nx / PITCH_LENGTH)).astype(np.intp), nx - 1)
+        iy = np.minimum((ys[inside] * (ny / PITCH_WIDTH)).astype(np.intp), ny - 1)
+        np.add.at(self.heatmaps, (slots[inside], ix, iy), 1)
+
     def update(self, frame_idx, tracks, field_coords):
         """
         Update analytics with new frame data.
         tracks: [x1, y1, x2, y2, id, score, cls]
         field_coords: [x, y] corresponding to tracks
         """
-        if len(tracks) != len(field_coords):
+        if len(tracks) != len(field_coords) or len(tracks) == 0:
             return
-            
-        current_positions = {}
-        
-        for i, track in enumerate(tracks):
-            track_id = int(track[4])
-            x, y = field_coords[i]
-            
-            # Store history
-            self.player_histories[track_id].append((frame_idx, x, y))
-            current_positions[track_id] = (x, y)
-            
+
+        # Slots first: a new id may grow the arrays written below
+        slots = np.fromiter((self._slot(int(track[4])) for track in tracks), dtype=np.intp, count=len(tracks))
+        coords = np.asarray(field_coords, dtype=np.float32).reshape(-1, 2)
+
+        # Store history, one ring write for the whole frame
+        heads = self.heads[slots]
+        ring_pos = heads % HISTORY_WINDOW
+        self.history[slots, ring_pos, 0] = frame_idx
+        self.history[slots, ring_pos, 1:] = coords
+        self.heads[slots] = heads + 1
+
+        self._accumulate_heatmaps(slots, coords)
+
         # Calculate Team Centroid (assuming we know teams, here just all players)
-        if len(field_coords) > 0:
-            centroid = np.mean(field_coords, axis=0)
-            self.team_centroids[frame_idx] = centroid
-            
+        self.team_centroids[frame_idx] = np.mean(field_coords, axis=0)
+
     def calculate_speed(self, track_id, window_frames=15):
         """
         Calculate current speed in m/s (or km/h)
         """
-        history = self.player_histories[track_id]
-        if len(history) < 2:
-            return 0.0
-            
-        # Get recent history
-        recent = history[-window_frames:]
-        if len(recent) < 2:
+        slot = self.track_slots.get(track_id)
+        if slot is None:
             return 0.0
-            
-        # Calculate distance traveled
-        start_pos = np.array(recent[0][1:])
-        end_pos = np.array(recent[-1][1:])
-        dist = np.linalg.norm(end_pos - start_pos)
-        
-        # Calculate time
-        time_sec = (recent[-1][0] - recent[0][0]) / self.fps
-        
-        if time_sec == 0: return 0.0
-        
-        speed_mps = dist / time_sec
-        speed_kmh = speed_mps * 3.6
-        
-        return speed_kmh
-        
-    def get_heatmap(self, track_id, grid_size=(105, 68)):
+        return float(_speed_kernel(self.history[slot], self.heads[slot], window_frames, float(self.fps)))
+
+    def get_heatmap(self, track_id, grid_size=HEATMAP_GRID):
         """
-        Generate 2D histogram for player position
+        Generate 2D histogram for player position over the whole track.
+        Counts are kept at HEATMAP_GRID; other grid sizes are rebinned from them, splitting
+        each 1 m cell across the coarser cells it overlaps (exact when the sizes divide evenly).
         """
-        history = self.player_histories[track_id]
-        if not history:
-            return np.zeros(grid_size)
-            
-        x_coords = [p[1] for p in history]
-        y_coords = [p[2] for p in history]
-        
-        heatmap, _, _ = np.histogram2d(x_coords, y_coords, bins=grid_size, range=[[0, 105], [0, 68]])
-        return heatmap
+        nx, ny = grid_size
+        slot = self.track_slots.get(track_id)
+        if slot is None:
+            return np.zeros((nx, ny), dtype=np.float32)
+
+        counts = self.heatmaps[slot]
+        if (nx, ny) == HEATMAP_GRID:
+            return counts.copy()
+        wx = _rebin_weights(HEATMAP_GRID[0], nx, float(PITCH_LENGTH))
+        wy = _rebin_weights(HEATMAP_GRID[1], ny, float(PITCH_WIDTH))
+        return wx @ counts @ wy.T
@@ -27,7 +27,9 @@ def get_team_brightness(crops):
     """Calculate average brightness of team crops."""
     if not crops:
         return 128
-    brightnesses = [np.mean(crop) for crop in crops]
+    # cv2.mean gives per-channel means without a float64 copy of the crop; averaging
+    # the three BGR means matches np.mean(crop)
+    brightnesses = [sum(cv2.mean(crop)[:3]) / 3 for crop in crops]
     return np.mean(brightnesses)
 
 
@@ -154,9 +156,10 @@ def analyze_image_fixed(image_path, output_path="fixed_result.jpg", show=True):
     annotator_manager = tactical_pipeline.detection_pipeline.annotator_manager if hasattr(tactical_pipeline.detection_pipeline, 'annotator_manager') else None
     
     if annotator_manager:
-        annotated_frame = annotator_manager.annotate_all(frame, player_dets, ball_dets, ref_dets)
+        # frame isn't needed unannotated after this, so skip the full-frame copy
+        annotated_frame = annotator_manager.annotate_all(frame, player_dets, ball_dets, ref_dets, inplace=True)
     else:
-        annotated_frame = frame.copy()
+        annotated_frame = frame
     
     dashboard = tactical_pipeline.create_side_by_side_frame(
         annotated_frame, tactical_frame, metadata, frame_height=480
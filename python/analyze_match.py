@@ -1,8 +1,11 @@
 import argparse
+import contextlib
 import cv2
-import json
+import orjson
 import sys
 import os
+import queue
+import threading
 import numpy as np
 from tqdm import tqdm
 
@@ -13,9 +16,57 @@ from python.models.fusion_detector import FusionDetector
 from python.trackers.hybrid_tracker import HybridTracker
 from python.utils.scene_analyzer import SceneAnalyzer
 from python.utils.optical_flow import OpticalFlowEngine
+from python.utils.video_utils import open_capture
 from python.utils.field_calibration import FieldCalibrator
 from python.analytics.tactical_analytics import TacticalAnalytics
 
+BATCH_SIZE = 8 # Frames per detector call
+READ_QUEUE_SIZE = 32 # Decoded frames buffered ahead of the pipeline
+
+def _read_frames(cap, frame_queue, stop):
+    """Producer thread: decode frames so reading overlaps inference. None marks the end; stop ends it early."""
+    while not stop.is_set():
+        ret, frame = cap.read()
+        item = frame if ret else None
+        # Timed puts so a consumer that died can't leave this thread blocked on a full queue
+        while not stop.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        if item is None:
+            return
+
+def _detect_batch(detector, frames, scene_infos):
+    """
+    One forward pass for the whole batch when the detector provides detect_batch.
+    Detectors without it (the current FusionDetector API) are still called frame by frame.
+    """
+    if hasattr(detector, "detect_batch"):
+        return detector.detect_batch(frames, scene_infos)
+    return [detector.detect(frame, info) for frame, info in zip(frames, scene_infos)]
+
+def _build_objects(tracks, field_coords, analytics):
+    """Per-object dicts for one frame; columns are converted once instead of per element"""
+    tracks = np.asarray(tracks).reshape(-1, 7)
+    ids = tracks[:, 4].astype(np.int32).tolist()
+    boxes = tracks[:, :4].astype(np.int32).tolist()
+    scores = tracks[:, 5].tolist()
+    classes = tracks[:, 6].astype(np.int32).tolist()
+    
+    objects = [{"id": track_id, "box": box, "score": score, "class": cls}
+               for track_id, box, score, cls in zip(ids, boxes, scores, classes)]
+    
+    # Only the first len(field_coords) tracks have a field position
+    n_field = min(len(field_coords), len(objects))
+    if n_field:
+        field_pos = np.asarray(field_coords[:n_field], dtype=np.float64).tolist()
+        for obj, pos in zip(objects, field_pos):
+            obj["field_pos"] = pos
+            obj["speed"] = analytics.calculate_speed(obj["id"])
+    return objects
+
 def analyze_match(video_path, output_path, calibration_points=None):
     print(f"Starting Elite Analysis for: {video_path}")
     
@@ -35,7 +86,7 @@ def analyze_match(video_path, output_path, calibration_points=None):
         # Assuming 1920x1080 video looking at full pitch
         calibrator.calibrate_manual([[200, 200], [1720, 200], [1920, 1080], [0, 1080]])
 
-    cap = cv2.VideoCapture(video_path)
+    cap = open_capture(video_path)
     if not cap.isOpened():
         print("Error: Could not open video.")
         return
@@ -45,88 +96,97 @@ def analyze_match(video_path, output_path, calibration_points=None):
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     
-    results = {
-        "metadata": {
-            "fps": fps,
-            "width": width,
-            "height": height,
-            "total_frames": total_frames
-        },
-        "tracks": [],
-        "analytics": {
-            "speeds": {},
-            "distances": {}
-        }
+    metadata = {
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "total_frames": total_frames
     }
     
+    # Stream frames straight to disk, one per line, instead of holding every frame in RAM.
+    # The file is still a single JSON document so existing readers can json.load it.
+    # Written to a .part file and renamed at the end, so a failed run never replaces a good result
+    part_path = output_path + '.part'
+
     # 2. Process Video
-    frame_idx = 0
     pbar = tqdm(total=total_frames, desc="Processing Frames")
+    frame_queue = queue.Queue(maxsize=READ_QUEUE_SIZE)
+    stop_reader = threading.Event()
+    reader = threading.Thread(target=_read_frames, args=(cap, frame_queue, stop_reader), daemon=True)
+    reader.start()
+    try:
+        with open(part_path, 'wb') as out:
+            out.write(b'{"metadata":' + orjson.dumps(metadata) + b',\n"tracks":[\n')
+            frame_idx = 0
     
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+            end_of_video = False
+            while not end_of_video:
+                batch = []
+                while len(batch) < BATCH_SIZE:
+                    frame = frame_queue.get()
+                    if frame is None:
+                        end_of_video = True
+                        break
+                    batch.append(frame)
+                if not batch:
+                    break
             
-        # A. Scene Analysis
-        scene_info = scene_analyzer.analyze(frame)
-        
-        # B. Multi-Model Detection
-        detections = detector.detect(frame, scene_info)
-        
-        # C. Hybrid Tracking
-        tracks = tracker.update(detections, frame)
-        
-        # D. Optical Flow Stabilization
-        tracks = optical_flow.stabilize(tracks, frame)
+                # A. Scene Analysis (stateful, so kept in frame order)
+                scene_infos = [scene_analyzer.analyze(frame) for frame in batch]
         
-        # E. Field Calibration
-        field_coords = calibrator.transform(tracks)
+                # B. Multi-Model Detection (batched)
+                batch_detections = _detect_batch(detector, batch, scene_infos)
         
-        # F. Analytics Update
-        analytics.update(frame_idx, tracks, field_coords)
-        
-        # Store frame results
-        frame_data = {
-            "frame": frame_idx,
-            "timestamp": frame_idx / fps,
-            "scene": {
-                "is_crowded": bool(scene_info.is_crowded),
-                "is_shaky": bool(scene_info.is_shaky)
-            },
-            "objects": []
-        }
-        
-        for i, track in enumerate(tracks):
-            track_id = int(track[4])
-            x1, y1, x2, y2 = map(int, track[:4])
+                for frame, scene_info, detections in zip(batch, scene_infos, batch_detections):
+                    # C. Optical Flow (global camera motion since the previous frame)
+                    camera_motion = optical_flow.estimate_camera_motion(frame)
             
-            obj_data = {
-                "id": track_id,
-                "box": [x1, y1, x2, y2],
-                "score": float(track[5]),
-                "class": int(track[6])
-            }
+                    # D. Hybrid Tracking, motion-compensated inside the tracker's predict step
+                    tracks = tracker.update(detections, frame, flow=camera_motion)
+            
+                    # E. Field Calibration
+                    field_coords = calibrator.transform(tracks)
+            
+                    # F. Analytics Update
+                    analytics.update(frame_idx, tracks, field_coords)
+            
+                    # Store frame results
+                    frame_data = {
+                        "frame": frame_idx,
+                        "timestamp": frame_idx / fps,
+                        "scene": {
+                            "is_crowded": bool(scene_info.is_crowded),
+                            "is_shaky": bool(scene_info.is_shaky)
+                        },
+                    }
             
-            if i < len(field_coords):
-                fx, fy = field_coords[i]
-                obj_data["field_pos"] = [float(fx), float(fy)]
-                obj_data["speed"] = analytics.calculate_speed(track_id)
+                    frame_data["objects"] = _build_objects(tracks, field_coords, analytics)
                 
-            frame_data["objects"].append(obj_data)
+                    if frame_idx > 0:
+                        out.write(b',\n')
+                    out.write(orjson.dumps(frame_data, option=orjson.OPT_SERIALIZE_NUMPY))
             
-        results["tracks"].append(frame_data)
-        
-        frame_idx += 1
-        pbar.update(1)
-        
-    pbar.close()
-    cap.release()
-    
-    # 3. Save Results
-    print(f"Saving results to {output_path}...")
-    with open(output_path, 'w') as f:
-        json.dump(results, f)
+                    frame_idx += 1
+                    pbar.update(1)
+
+            # 3. Close out the document
+            print(f"Saving results to {output_path}...")
+            analytics_data = {
+                "speeds": {},
+                "distances": {}
+            }
+            out.write(b'\n],"analytics":' + orjson.dumps(analytics_data) + b'}\n')
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(part_path)
+        raise
+    finally:
+        # The reader still owns cap, so it is stopped and joined before the capture is released
+        stop_reader.set()
+        reader.join()
+        pbar.close()
+        cap.release()
+    os.replace(part_path, output_path)
         
     print("Analysis Complete!")
 
@@ -8,9 +8,20 @@ PROJECT_DIR = Path(__file__).resolve().parent.parent
 if str(PROJECT_DIR) not in sys.path:
     sys.path.append(str(PROJECT_DIR))
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Fallback so the module still imports; annotate_keypoints then uses its NumPy path
+    NUMBA_AVAILABLE = False
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
 try:
     import supervision as sv
+    SUPERVISION_AVAILABLE = True
 except ImportError:
+    SUPERVISION_AVAILABLE = False
     # Fallback to prevent crash if supervision is not installed
     class MockAnnotator:
         def annotate(self, frame, detections, labels=None, **kwargs): return frame
@@ -31,19 +42,109 @@ except ImportError:
         EllipseAnnotator = TriangleAnnotator = LabelAnnotator = BoxAnnotator = VertexAnnotator = EdgeAnnotator = MockAnnotator
 
 
+@njit(cache=True)
+def _filter_keypoints(kp, edges, threshold):
+    """
+    Confidence/bounds filtering for a (people, keypoints, 3) array.
+    Returns int32 (person, x1, y1, x2, y2) lines and (person, kpt_idx, x, y) points, ordered by person.
+    """
+    n_people, n_kpts = kp.shape[0], kp.shape[1]
+    segments = np.empty((n_people * edges.shape[0], 5), dtype=np.int32)
+    points = np.empty((n_people * n_kpts, 4), dtype=np.int32)
+    n_segments = 0
+    n_points = 0
+    for p in range(n_people):
+        for e in range(edges.shape[0]):
+            a, b = edges[e, 0], edges[e, 1]
+            if a >= n_kpts or b >= n_kpts:
+                continue
+            if a < 0: # Negative indices wrap like NumPy indexing
+                a += n_kpts
+            if b < 0:
+                b += n_kpts
+            if a < 0 or b < 0:
+                continue
+            if kp[p, a, 2] > threshold and kp[p, b, 2] > threshold:
+                segments[n_segments, 0] = p
+                segments[n_segments, 1] = np.int32(kp[p, a, 0])
+                segments[n_segments, 2] = np.int32(kp[p, a, 1])
+                segments[n_segments, 3] = np.int32(kp[p, b, 0])
+                segments[n_segments, 4] = np.int32(kp[p, b, 1])
+                n_segments += 1
+        for k in range(n_kpts):
+            if kp[p, k, 2] > threshold:
+                points[n_points, 0] = p
+                points[n_points, 1] = k
+                points[n_points, 2] = np.int32(kp[p, k, 0])
+                points[n_points, 3] = np.int32(kp[p, k, 1])
+                n_points += 1
+    return segments[:n_segments], points[:n_points]
+
+
+class FusedPlayerAnnotator:
+    """
+    Draws supervision's default ellipse and top-left label for each player in a single pass,
+    instead of running EllipseAnnotator and LabelAnnotator over the detections one after the other.
+    """
+
+    def __init__(self, thickness=2, start_angle=-45, end_angle=235,
+                 text_scale=0.5, text_thickness=1, text_padding=10, text_color=(255, 255, 255)):
+        # ColorPalette.DEFAULT only exists in newer supervision; older releases expose default()
+        palette = getattr(sv.ColorPalette, 'DEFAULT', None) or sv.ColorPalette.default()
+        self.palette = [color.as_bgr() for color in palette.colors]
+        self.thickness = thickness
+        self.start_angle = start_angle
+        self.end_angle = end_angle
+        self.text_scale = text_scale
+        self.text_thickness = text_thickness
+        self.text_padding = text_padding
+        self.text_color = text_color
+
+    def annotate(self, frame: np.ndarray, detections: 'sv.Detections', labels) -> np.ndarray:
+        xyxy = np.asarray(detections.xyxy).astype(int)
+        # Colors by class, like supervision's default ColorLookup.CLASS
+        color_ids = detections.class_id if detections.class_id is not None else np.arange(len(xyxy))
+        colors = [self.palette[color_id % len(self.palette)] for color_id in np.asarray(color_ids).tolist()]
+
+        # Ellipse geometry for every player at once
+        widths = xyxy[:, 2] - xyxy[:, 0]
+        centers = np.stack([((xyxy[:, 0] + xyxy[:, 2]) / 2).astype(int), xyxy[:, 3]], axis=1).tolist()
+        axes = np.stack([widths, (0.35 * widths).astype(int)], axis=1).tolist()
+
+        font = cv2.FONT_HERSHEY_SIMPLEX
+        pad = self.text_padding
+        for (x1, y1), center, axis, color, label in zip(xyxy[:, :2].tolist(), centers, axes, colors, labels):
+            cv2.ellipse(frame, tuple(center), tuple(axis), 0.0, self.start_angle, self.end_angle,
+                        color, self.thickness, cv2.LINE_4)
+
+            # Label box sits on top of the bbox's top-left corner
+            (text_w, text_h), _ = cv2.getTextSize(label, font, self.text_scale, self.text_thickness)
+            box_y1 = y1 - text_h - 2 * pad
+            cv2.rectangle(frame, (x1, box_y1), (x1 + text_w + 2 * pad, y1), color, cv2.FILLED)
+            cv2.putText(frame, label, (x1 + pad, box_y1 + pad + text_h), font, self.text_scale,
+                        self.text_color, self.text_thickness, cv2.LINE_AA)
+
+        return frame
+
+
 class AnnotatorManager:
     """
     Manager class for all annotation functionality.
     Provides a unified interface for annotating players, ball, referees, and keypoints.
     """
 
-    def __init__(self, edges=None):
-        """Initialize all annotation tools."""
+    def __init__(self, edges=None, keypoint_connections=None):
+        """
+        Initialize all annotation tools.
+        keypoint_connections: 0-based (a, b) index pairs used by annotate_keypoints when it isn't passed its own.
+        """
         # Basic annotators
         self.ellipse_annotator = sv.EllipseAnnotator()
         self.triangle_annotator = sv.TriangleAnnotator()
         self.label_annotator = sv.LabelAnnotator()
         self.box_annotator = sv.BoxAnnotator()
+        # Without supervision the ellipse/label mocks draw nothing, so there is nothing to fuse
+        self.player_annotator = FusedPlayerAnnotator() if SUPERVISION_AVAILABLE else None
 
         # Keypoint annotators
         try:
@@ -53,17 +154,31 @@ class AnnotatorManager:
             self.vertex_annotator = sv.VertexAnnotator()
             self.edge_annotator = sv.EdgeAnnotator()
 
+        # (E, 2) edge index array, converted once instead of on every annotate_keypoints call
+        self._edges = np.asarray(keypoint_connections or [], dtype=np.intp).reshape(-1, 2)
+
+    @staticmethod
+    def _prep(detections, need_ids: bool = False) -> int:
+        """
+        Number of detections (0 for None). With need_ids, fills in sequential tracker ids when missing.
+        """
+        if detections is None:
+            return 0
+        n = len(detections.xyxy)
+        if n and need_ids and getattr(detections, 'tracker_id', None) is None:
+            detections.tracker_id = np.arange(n)
+        return n
+
     def annotate_players(self, frame: np.ndarray, player_detections: 'sv.Detections') -> np.ndarray:
         """
         Annotate only players on the frame.
         """
-        if player_detections is None or len(player_detections.xyxy) == 0:
+        if not self._prep(player_detections, need_ids=True):
             return frame
-
-        if getattr(player_detections, 'tracker_id', None) is None:
-            player_detections.tracker_id = np.arange(len(player_detections.xyxy))
         
         player_labels = [f'#{tracker_id}' for tracker_id in player_detections.tracker_id]
+        if self.player_annotator is not None:
+            return self.player_annotator.annotate(frame, player_detections, player_labels)
         frame = self.ellipse_annotator.annotate(frame, player_detections)
         frame = self.label_annotator.annotate(frame, detections=player_detections, labels=player_labels)
 
@@ -73,7 +188,7 @@ class AnnotatorManager:
         """
         Annotate ball detections on frame.
         """
-        if ball_detections is not None and len(ball_detections.xyxy) > 0:
+        if self._prep(ball_detections):
             return self.triangle_annotator.annotate(frame, ball_detections)
         return frame
 
@@ -81,17 +196,17 @@ class AnnotatorManager:
         """
         Annotate referee detections on frame.
         """
-        if referee_detections is not None and len(referee_detections.xyxy) > 0:
-            if getattr(referee_detections, 'tracker_id', None) is None:
-                referee_detections.tracker_id = np.arange(len(referee_detections.xyxy))
+        if self._prep(referee_detections, need_ids=True):
             return self.ellipse_annotator.annotate(frame, referee_detections)
         return frame
 
-    def annotate_all(self, frame: np.ndarray, player_detections, ball_detections, referee_detections) -> np.ndarray:
+    def annotate_all(self, frame: np.ndarray, player_detections, ball_detections, referee_detections,
+                     inplace: bool = False) -> np.ndarray:
         """
         Annotate players, ball, and referees on the frame using separate methods.
+        Pass inplace=True to draw on the caller's buffer instead of a copy.
         """
-        target_frame = frame.copy()
+        target_frame = frame if inplace else frame.copy()
 
         # Annotate each type separately
         target_frame = self.annotate_players(target_frame, player_detections)
@@ -100,76 +215,157 @@ class AnnotatorManager:
 
         return target_frame
 
-    def annotate_bboxes(self, frame: np.ndarray, detections: 'sv.Detections', class_names: dict = None) -> np.ndarray:
+    def annotate_bboxes(self, frame: np.ndarray, detections: 'sv.Detections', class_names: dict = None,
+                        inplace: bool = False) -> np.ndarray:
         """
         Annotate frame with object detections bboxes.
+        Pass inplace=True to draw on the caller's buffer instead of a copy.
         """
-        if detections is None or len(detections.xyxy) == 0:
+        if not self._prep(detections):
             return frame
 
-        annotated_frame = frame.copy()
+        annotated_frame = frame if inplace else frame.copy()
 
         # Annotate with boxes
         annotated_frame = self.box_annotator.annotate(annotated_frame, detections)
 
         # Add labels if class_names provided
         if class_names is not None:
-            labels = []
-            for class_id, conf in zip(detections.class_id, detections.confidence):
-                class_name = class_names.get(class_id, f'Class {class_id}')
-                labels.append(f"{class_name} {conf:.2f}")
+            # One dict lookup per distinct class, then the strings are joined column-wise
+            class_ids, inverse = np.unique(np.asarray(detections.class_id), return_inverse=True)
+            names = np.array([class_names.get(class_id, f'Class {class_id}') for class_id in class_ids.tolist()],
+                             dtype=str)[inverse]
+            confs = np.char.mod('%.2f', np.asarray(detections.confidence))
+            labels = np.char.add(np.char.add(names, ' '), confs).tolist()
             annotated_frame = self.label_annotator.annotate(annotated_frame, detections, labels)
 
         return annotated_frame
 
     def annotate_keypoints(self, frame: np.ndarray, keypoints: np.ndarray, confidence_threshold: float = 0.5,
                           draw_vertices: bool = True, draw_edges = None, draw_labels: bool = True,
-                          KEYPOINT_CONNECTIONS=[], KEYPOINT_NAMES={}, 
+                          KEYPOINT_CONNECTIONS=None, KEYPOINT_NAMES={}, 
                           KEYPOINT_COLOR=(0, 255, 0), CONNECTION_COLOR=(255, 0, 0), TEXT_COLOR=(255, 255, 255)) -> np.ndarray:
         """
         Annotate frame with detected keypoints using Vertex and Edge annotators.
         """
-        for kpts in keypoints:
-            # Draw keypoint connections
-            if draw_edges:
-                for connection in KEYPOINT_CONNECTIONS:
-                    pt1_idx, pt2_idx = connection
-                    if pt1_idx < len(kpts) and pt2_idx < len(kpts):
-                        pt1 = kpts[pt1_idx]
-                        pt2 = kpts[pt2_idx]
-                        if pt1[2] > confidence_threshold and pt2[2] > confidence_threshold:
-                            cv2.line(frame,
-                                (int(pt1[0]), int(pt1[1])),
-                                (int(pt2[0]), int(pt2[1])),
-                                CONNECTION_COLOR, 2)
+        # Connection endpoints and label text don't change between people, so build them once
+        if not draw_edges:
+            connections = self._edges[:0]
+        elif KEYPOINT_CONNECTIONS is None:
+            connections = self._edges
+        else:
+            connections = np.asarray(KEYPOINT_CONNECTIONS, dtype=np.intp).reshape(-1, 2)
+        labels = {}
+
+        for segments, points in self._keypoint_primitives(keypoints, connections, confidence_threshold):
+            # Draw keypoint connections (only pairs with both ends present and confident)
+            for x1, y1, x2, y2 in segments:
+                cv2.line(frame, (x1, y1), (x2, y2), CONNECTION_COLOR, 2)
 
             # Draw keypoints
-            for kpt_idx, kpt in enumerate(kpts):
-                if kpt[2] > confidence_threshold:
-                    x, y = int(kpt[0]), int(kpt[1])
-                    cv2.circle(frame, (x, y), 5, KEYPOINT_COLOR, -1)
-                    if draw_labels:
-                        label = f"{kpt_idx}: {KEYPOINT_NAMES.get(kpt_idx, 'Unknown')}"
-                        cv2.putText(frame, label, (x + 10, y - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.4, TEXT_COLOR, 1)
+            for kpt_idx, x, y in points:
+                cv2.circle(frame, (x, y), 5, KEYPOINT_COLOR, -1)
+                if draw_labels:
+                    label = labels.get(kpt_idx)
+                    if label is None:
+                        label = labels[kpt_idx] = f"{kpt_idx}: {KEYPOINT_NAMES.get(kpt_idx, 'Unknown')}"
+                    cv2.putText(frame, label, (x + 10, y - 10),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, TEXT_COLOR, 1)
 
         return frame
 
+    def _keypoint_primitives(self, keypoints, connections, confidence_threshold):
+        """
+        Yields ([x1, y1, x2, y2] lines, [kpt_idx, x, y] points) per person with any confident keypoint.
+        """
+        kp = self._regular_keypoints(keypoints)
+        if NUMBA_AVAILABLE and kp is not None:
+            # Whole frame classified in one compiled call, then split back per person
+            segments, points = _filter_keypoints(kp, connections, confidence_threshold)
+            people, starts = np.unique(points[:, 0], return_index=True)
+            ends = np.append(starts[1:], len(points))
+            seg_starts = np.searchsorted(segments[:, 0], people, side='left')
+            seg_ends = np.searchsorted(segments[:, 0], people, side='right')
+            segments, points = segments[:, 1:].tolist(), points[:, 1:].tolist()
+            for start, end, seg_start, seg_end in zip(starts.tolist(), ends.tolist(), seg_starts.tolist(), seg_ends.tolist()):
+                yield segments[seg_start:seg_end], points[start:end]
+            return
+
+        edges_by_count = {} # keypoint count -> edges with both ends in range
+        for xy, valid in self._confident_people(keypoints, confidence_threshold):
+            pairs = edges_by_count.get(len(xy))
+            if pairs is None:
+                pairs = edges_by_count[len(xy)] = connections[(connections < len(xy)).all(axis=1)]
+            pairs = pairs[valid[pairs[:, 0]] & valid[pairs[:, 1]]]
+            kpt_indices = np.flatnonzero(valid)
+            yield (np.hstack([xy[pairs[:, 0]], xy[pairs[:, 1]]]).tolist(),
+                   np.column_stack([kpt_indices, xy[kpt_indices]]).tolist())
+
+    @staticmethod
+    def _regular_keypoints(keypoints):
+        """
+        keypoints as one (people, keypoints, 3) numeric array, or None for ragged per-person input.
+        """
+        try:
+            kp = np.asarray(keypoints)
+        except ValueError: # Ragged per-person arrays
+            return None
+        if kp.ndim == 3 and kp.dtype != object:
+            return kp
+        return None
+
+    @staticmethod
+    def _confident_people(keypoints, confidence_threshold):
+        """
+        Yields (int32 xy, confidence mask) per person, skipping people with no keypoint above the threshold.
+        """
+        kp = AnnotatorManager._regular_keypoints(keypoints)
+        if kp is not None:
+            # Regular (people, keypoints, 3) array: threshold and cast everyone at once
+            conf_mask = kp[..., 2] > confidence_threshold
+            int_xy = kp[..., :2].astype(np.int32)
+            for i in np.flatnonzero(conf_mask.any(axis=1)).tolist():
+                yield int_xy[i], conf_mask[i]
+            return
+
+        for kpts in keypoints:
+            kpts = np.asarray(kpts)
+            if len(kpts) == 0:
+                continue
+            valid = kpts[:, 2] > confidence_threshold
+            if valid.any():
+                yield kpts[:, :2].astype(np.int32), valid
+
+    @staticmethod
+    def _stack_tracks(tracks):
+        """
+        {tracker_id: xyxy} -> (N, 4) box array and (N,) id array, filled in one pass.
+        """
+        n = len(tracks)
+        xyxy = np.empty((n, 4), dtype=np.float32)
+        tracker_ids = np.empty(n, dtype=np.int32)
+        for i, (tracker_id, box) in enumerate(tracks.items()):
+            xyxy[i] = box
+            tracker_ids[i] = tracker_id
+        return xyxy, tracker_ids
+
     def convert_tracks_to_detections(self, player_tracks, ball_tracks, referee_tracks, player_classids=None):
         """
         Convert tracking data back to supervision detections format.
         """
         # Get the player detections
         if player_tracks is not None:
+            xyxy, tracker_ids = self._stack_tracks(player_tracks)
             if player_classids is not None:
-                class_ids = [player_classids[tracker_id] for tracker_id in player_tracks.keys()]
+                class_ids = np.fromiter((player_classids[tracker_id] for tracker_id in player_tracks),
+                                        dtype=np.int32, count=len(player_tracks))
             else:
-                class_ids = [0] * len(player_tracks)
+                class_ids = np.zeros(len(player_tracks), dtype=np.int32)
             
             player_detections = sv.Detections(
-                xyxy=np.array(list(player_tracks.values())),
-                class_id=np.array(class_ids),
-                tracker_id=np.array(list(player_tracks.keys()))
+                xyxy=xyxy,
+                class_id=class_ids,
+                tracker_id=tracker_ids
             )
         else:
             player_detections = None
@@ -185,10 +381,11 @@ class AnnotatorManager:
 
         # Get the referee detections
         if referee_tracks is not None:
+            xyxy, tracker_ids = self._stack_tracks(referee_tracks)
             referee_detections = sv.Detections(
-                xyxy=np.array(list(referee_tracks.values())),
-                class_id=np.array([3] * len(referee_tracks)),
-                tracker_id=np.array(list(referee_tracks.keys()))
+                xyxy=xyxy,
+                class_id=np.full(len(referee_tracks), 3, dtype=np.int32),
+                tracker_id=tracker_ids
             )
         else:
             referee_detections = None
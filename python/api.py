@@ -1,10 +1,14 @@
 import os
+import asyncio
 import shutil
+import threading
+import itertools
+import uuid
 import json
 import uvicorn
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pathlib import Path
 import base64
 import cv2
@@ -14,13 +18,24 @@ from typing import Optional
 # Global analyzer instance for single-frame detection
 _global_analyzer = None
 
+# Detection requests share the analyzer's homography, so projection runs one at a time
+DETECT_CONCURRENCY = 1
+_detect_semaphore = asyncio.Semaphore(DETECT_CONCURRENCY)
+
+# Local-model requests arriving within BATCH_WINDOW_S of each other share one predict call
+BATCH_WINDOW_S = 0.010
+BATCH_MAX = 8
+
+_analyzer_lock = threading.Lock() # get_analyzer is called from worker threads
+
 def get_analyzer():
     global _global_analyzer
-    if _global_analyzer is None and SoccerMatchAnalyzer:
-        config = AnalysisConfig(confidence_threshold=0.3)
-        _global_analyzer = SoccerMatchAnalyzer(config)
-        _global_analyzer.load_model()
-        _global_analyzer.load_roboflow_model()
+    with _analyzer_lock:
+        if _global_analyzer is None and SoccerMatchAnalyzer:
+            config = AnalysisConfig(confidence_threshold=0.3)
+            _global_analyzer = SoccerMatchAnalyzer(config)
+            _global_analyzer.load_model()
+            _global_analyzer.load_roboflow_model()
     return _global_analyzer
 
 # Import analysis modules
@@ -35,6 +50,13 @@ except Exception as e:
 
 # Check GPU availability
 import torch
+try:
+    from torchvision.io import decode_jpeg # nvJPEG decode straight into GPU memory
+except ImportError:
+    decode_jpeg = None
+from utils.model_input import to_model_tensor
+
+UPLOAD_CHUNK = 4 * 1024 * 1024 # copyfileobj's default 16 KB means thousands of syscalls per video
 if torch.cuda.is_available():
     print(f"✅ GPU Detected: {torch.cuda.get_device_name(0)}")
 else:
@@ -51,6 +73,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _save_upload(upload: UploadFile, dest: Path):
+    """Writes an uploaded file to dest. Uploads Starlette already spooled to disk are copied in-kernel."""
+    src = upload.file
+    with open(dest, "wb") as buffer:
+        # fileno() on a still in-memory spool would force a rollover to disk first, so check before asking
+        if hasattr(os, "sendfile") and getattr(src, "_rolled", False):
+            src.flush()
+            offset = src.tell()
+            size = os.fstat(src.fileno()).st_size
+            while offset < size:
+                sent = os.sendfile(buffer.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            src.seek(offset)
+        else:
+            shutil.copyfileobj(src, buffer, UPLOAD_CHUNK)
+
 @app.get("/")
 def health_check():
     return {"status": "healthy", "service": "soccer-analysis-api"}
@@ -72,8 +112,7 @@ async def analyze_match(
         
         # Save uploaded video
         video_path = temp_dir / video.filename
-        with open(video_path, "wb") as buffer:
-            shutil.copyfileobj(video.file, buffer)
+        _save_upload(video, video_path)
             
         print(f"Received video: {video.filename}, Size: {os.path.getsize(video_path)} bytes")
         
@@ -111,99 +150,189 @@ async def analyze_match(
             content={"success": False, "error": str(e)}
         )
 
-@app.post("/api/detect-players")
-async def detect_players_endpoint(
-    image: str = Form(...),
-    homography: Optional[str] = Form(None),
-    high_contrast: bool = Form(False)
-):
-    """Detect players in a single frame and project them onto the pitch."""
-    analyzer = get_analyzer()
+def _decode_jpeg_on_gpu(image_data: bytes):
+    """RGB uint8 (3, H, W) CUDA tensor decoded with nvJPEG, or None to fall back to cv2.imdecode."""
+    if decode_jpeg is None or not torch.cuda.is_available() or image_data[:2] != b"\xff\xd8":
+        return None
+    try:
+        return decode_jpeg(torch.frombuffer(bytearray(image_data), dtype=torch.uint8), device="cuda")
+    except (RuntimeError, TypeError):
+        return None # JPEG variants nvJPEG can't handle, or a torchvision without device= support
+
+def _gpu_model_input(rgb):
+    """(3, H, W) uint8 CUDA image -> normalized (1, 3, H', W') tensor at a stride multiple, plus (sx, sy) back to the image"""
+    return to_model_tensor(rgb.unsqueeze(0), bgr=False, half=False)
+
+def _decode_base64_image(image: str) -> bytes:
+    """Strips an optional data-URL header and returns the encoded image bytes."""
+    header, encoded = image.split(",", 1) if "," in image else (None, image)
+    return base64.b64decode(encoded)
+
+def _decode_image(analyzer, image_data: bytes):
+    """Returns (frame, gpu_rgb): a host BGR frame, or an nvJPEG-decoded CUDA image for the local model."""
+    # The local model can take the JPEG decoded straight into GPU memory; Roboflow needs a host image
+    gpu_rgb = None if analyzer.roboflow_model else _decode_jpeg_on_gpu(image_data)
+    if gpu_rgb is not None:
+        print(f"🖼️ Decoded image size (GPU): {tuple(gpu_rgb.shape)}")
+        return None, gpu_rgb
+
+    nparr = np.frombuffer(image_data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+
+    if frame is None:
+        print("❌ Error: Failed to decode image")
+        raise ValueError("Failed to decode image")
+
+    print(f"🖼️ Decoded image size: {frame.shape}")
+    return frame, None
+
+def _roboflow_detect(analyzer, frame) -> tuple:
+    """Returns (xyxy boxes, confidences, class ids) as arrays."""
+    print("✨ Using Roboflow model")
+    detections = analyzer.roboflow_model.get_detections(frame, confidence=analyzer.config.confidence_threshold)
+    return detections.xyxy, detections.confidence, detections.class_id
+
+def _yolo_predict_batch(analyzer, items: list) -> list:
+    """
+    Runs the local model over several requests' (frame, gpu_rgb) inputs and returns one
+    (xyxy boxes, confidences, class ids) tuple per item.
+    Host frames go in as one list (Ultralytics letterboxes them to a common size); GPU images are
+    grouped by prepared size and concatenated, since a tensor batch needs a single shape.
+    """
+    print(f"🚀 Using local YOLO model (batch of {len(items)})")
+    runs = []
+    host = [i for i, (frame, gpu_rgb) in enumerate(items) if gpu_rgb is None]
+    if host:
+        runs.append((host, [items[i][0] for i in host], [(1.0, 1.0)] * len(host)))
+    groups = {}
+    for i, (_, gpu_rgb) in enumerate(items):
+        if gpu_rgb is not None:
+            source, scale = _gpu_model_input(gpu_rgb)
+            groups.setdefault(tuple(source.shape), []).append((i, source, scale))
+    for group in groups.values():
+        runs.append(([i for i, _, _ in group], torch.cat([t for _, t, _ in group]), [sc for _, _, sc in group]))
+
+    out = [None] * len(items)
+    for indices, source, scales in runs:
+        results = analyzer.model.predict(
+            source,
+            conf=analyzer.config.confidence_threshold,
+            classes=[0, 32], # Person and Ball
+            verbose=False
+        )
+        # Boxes.data is already (N, 6) xyxy/conf/cls, so the whole run comes back in one device->host copy
+        packed = torch.cat([result.boxes.data for result in results]).cpu().numpy()
+        ends = np.cumsum([len(result.boxes) for result in results]).tolist()
+        for i, rows, (sx, sy) in zip(indices, np.split(packed, ends[:-1]), scales):
+            boxes = rows[:, :4] * np.array([sx, sy, sx, sy], dtype=np.float32)
+            out[i] = boxes, rows[:, 4], rows[:, 5].astype(int)
+    return out
+
+class _DetectionBatcher:
+    """
+    Micro-batches local-model requests: the first queued request waits up to BATCH_WINDOW_S
+    for others (at most BATCH_MAX), then all of them share one predict call.
+    """
+    def __init__(self):
+        self._queue = None
+        self._worker = None
+
+    async def submit(self, analyzer, frame, gpu_rgb) -> tuple:
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((analyzer, frame, gpu_rgb, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + BATCH_WINDOW_S
+            while len(batch) < BATCH_MAX:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            futures = [future for *_, future in batch]
+            try:
+                # Every request uses the same global analyzer
+                results = await asyncio.to_thread(_yolo_predict_batch, batch[0][0],
+                                                  [(frame, gpu_rgb) for _, frame, gpu_rgb, _ in batch])
+            except Exception as e:
+                for future in futures:
+                    if not future.done(): # Cancelled when the client went away
+                        future.set_exception(e)
+                continue
+            for future, result in zip(futures, results):
+                if not future.done():
+                    future.set_result(result)
+
+_batcher = _DetectionBatcher()
+
+def _project_detections(analyzer, final_results: tuple, homography: Optional[str]) -> list:
+    # Setup homography if provided
+    if homography:
+        print(f"🗺️ Setting up homography: {homography[:50]}...")
+        from soccer_analysis_core import HomographyTransform
+        analyzer.homography = HomographyTransform.from_string(homography)
+
+    boxes, confs, cls_ids = (np.asarray(column) for column in final_results)
+    boxes = boxes.reshape(-1, 4)
+    print(f"✅ Found {len(boxes)} objects")
+
+    # Bottom-center for feet-level projection, for all detections at once
+    centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+
+    # Transform to meters
+    if analyzer.homography and analyzer.homography.enabled:
+        pitch = analyzer.homography.transform_many(centers).tolist()
+    else:
+        pitch = [None] * len(centers)
+    centers = centers.tolist()
+
+    # Columns are converted to Python scalars once each, then zipped into the per-player records
+    cls_ids = cls_ids.astype(int).tolist()
+    players = [{
+        "id": i + 1,
+        "bbox": bbox,
+        "center": center,
+        "pitch_coords": pitch_coords,
+        "team": "BALL" if cls_id == 32 else "Unknown",
+        "confidence": conf,
+        "cls": cls_id
+    } for i, (bbox, center, pitch_coords, conf, cls_id)
+        in enumerate(zip(boxes.tolist(), centers, pitch, confs.astype(float).tolist(), cls_ids))]
+
+    return players
+
+async def _detect_players(get_image_data, homography: Optional[str], high_contrast: bool):
+    """Shared handler body; get_image_data runs on a worker thread and returns the encoded image."""
+    analyzer = await asyncio.to_thread(get_analyzer)
     if analyzer is None:
         raise HTTPException(status_code=500, detail="Analysis modules not loaded")
 
     try:
+        # high_contrast only changes team coloring in full-video tracking, which this endpoint doesn't run,
+        # so it is no longer written into the shared analyzer's config
         print(f"📥 Received detect-players request. High contrast: {high_contrast}")
-        analyzer.config.use_high_contrast_colors = high_contrast
-        # Decode base64 image
-        header, encoded = image.split(",", 1) if "," in image else (None, image)
-        image_data = base64.b64decode(encoded)
-        nparr = np.frombuffer(image_data, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        if frame is None:
-            print("❌ Error: Failed to decode image")
-            raise ValueError("Failed to decode image")
-
-        print(f"🖼️ Decoded image size: {frame.shape}")
-
-        # Setup homography if provided
-        if homography:
-            print(f"🗺️ Setting up homography: {homography[:50]}...")
-            from soccer_analysis_core import HomographyTransform
-            analyzer.homography = HomographyTransform.from_string(homography)
+        # Blocking work runs on worker threads so the event loop keeps serving other requests
+        frame, gpu_rgb = await asyncio.to_thread(lambda: _decode_image(analyzer, get_image_data()))
 
         # Run single frame detection
         print("🔍 Running detection...")
         if analyzer.roboflow_model:
-            print("✨ Using Roboflow model")
-            detections = analyzer.roboflow_model.get_detections(frame, confidence=analyzer.config.confidence_threshold)
-            boxes = detections.xyxy
-            confs = detections.confidence
-            cls_ids = detections.class_id
-            
-            final_results = []
-            for bbox, conf, cls_id in zip(boxes, confs, cls_ids):
-                final_results.append({
-                    'bbox': bbox,
-                    'conf': conf,
-                    'cls': cls_id
-                })
+            final_results = await asyncio.to_thread(_roboflow_detect, analyzer, frame)
         else:
-            print("🚀 Using local YOLO model")
-            results = analyzer.model.predict(
-                frame,
-                conf=analyzer.config.confidence_threshold,
-                classes=[0, 32], # Person and Ball
-                verbose=False
-            )
-            
-            final_results = []
-            for result in results:
-                boxes = result.boxes.xyxy.cpu().numpy()
-                confs = result.boxes.conf.cpu().numpy()
-                cls_ids = result.boxes.cls.cpu().numpy().astype(int)
-                for bbox, conf, cls_id in zip(boxes, confs, cls_ids):
-                    final_results.append({
-                        'bbox': bbox,
-                        'conf': conf,
-                        'cls': cls_id
-                    })
-
-        print(f"✅ Found {len(final_results)} objects")
-        players = []
-        for detection in final_results:
-            x1, y1, x2, y2 = detection['bbox']
-            conf = detection['conf']
-            cls_id = detection['cls']
-            
-            # Bottom-center for feet-level projection
-            foot_x, foot_y = float((x1 + x2) / 2), float(y2)
-            
-            # Transform to meters
-            xm, ym = None, None
-            if analyzer.homography and analyzer.homography.enabled:
-                xm, ym = analyzer.homography.transform(foot_x, foot_y)
-            
-            players.append({
-                "id": len(players) + 1,
-                "bbox": [float(x1), float(y1), float(x2), float(y2)],
-                "center": [foot_x, foot_y],
-                "pitch_coords": [xm, ym] if xm is not None else None,
-                "team": "BALL" if cls_id == 32 else "Unknown",
-                "confidence": float(conf),
-                "cls": int(cls_id)
-            })
+            final_results = await _batcher.submit(analyzer, frame, gpu_rgb)
+
+        async with _detect_semaphore:
+            players = await asyncio.to_thread(_project_detections, analyzer, final_results, homography)
 
         return {"success": True, "players": players}
 
@@ -216,6 +345,25 @@ async def detect_players_endpoint(
             content={"success": False, "error": str(e), "traceback": traceback.format_exc()}
         )
 
+@app.post("/api/detect-players", response_class=ORJSONResponse)
+async def detect_players_endpoint(
+    image: str = Form(...),
+    homography: Optional[str] = Form(None),
+    high_contrast: bool = Form(False)
+):
+    """Detect players in a single frame and project them onto the pitch."""
+    return await _detect_players(lambda: _decode_base64_image(image), homography, high_contrast)
+
+@app.post("/api/detect-players-binary", response_class=ORJSONResponse)
+async def detect_players_binary_endpoint(
+    image: UploadFile = File(...),
+    homography: Optional[str] = Form(None),
+    high_contrast: bool = Form(False)
+):
+    """Same as /api/detect-players, but the image is a raw multipart file instead of base64 text."""
+    image_data = await image.read()
+    return await _detect_players(lambda: image_data, homography, high_contrast)
+
 
 # --- CROWD ANNOTATION ENDPOINTS ---
 from pydantic import BaseModel
@@ -233,6 +381,82 @@ class CrowdReviewRequest(BaseModel):
 TACTABOT_DB = Path(__file__).parent / "tactabot.db"
 CLIPS_DIR = Path(__file__).parent.parent / "public" / "clips"
 UPLOADS_DIR = Path(__file__).parent.parent / "public" / "uploads"
+CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Unique file names: one random tag per process (restarts can reuse a pid) plus a counter
+_FILE_TAG = uuid.uuid4().hex[:8]
+_file_seq = itertools.count()
+
+def _unique_token() -> str:
+    return f"{_FILE_TAG}{next(_file_seq)}"
+
+# WAL lets the bot keep reading while we commit, and NORMAL sync skips the fsync on every commit.
+# journal_mode is stored in the file, so this only has to run once; tactabot.py owns the schema.
+if TACTABOT_DB.exists():
+    with sqlite3.connect(TACTABOT_DB) as _conn:
+        _conn.execute("PRAGMA journal_mode=WAL")
+
+# One connection per worker thread, reused across requests
+_db_local = threading.local()
+
+def _db_conn() -> sqlite3.Connection:
+    conn = getattr(_db_local, "conn", None)
+    if conn is None:
+        conn = _db_local.conn = sqlite3.connect(TACTABOT_DB)
+        conn.execute("PRAGMA synchronous=NORMAL") # Per-connection setting
+    return conn
+
+def _db_read_conn() -> sqlite3.Connection:
+    """Read-only counterpart of _db_conn for the status and community endpoints."""
+    conn = getattr(_db_local, "read_conn", None)
+    if conn is None:
+        conn = _db_local.read_conn = sqlite3.connect(f"{TACTABOT_DB.as_uri()}?mode=ro", uri=True)
+    return conn
+
+def _insert_crowd_clip(match_name: str, clip_filename: str, event_type: Optional[str]) -> int:
+    """Adds a clip to the crowd voting queue and returns its clip_id. Blocking, run via asyncio.to_thread."""
+    with _db_conn() as conn: # Commits on success, rolls back on error
+        c = conn.cursor()
+        
+        # Create or get match
+        c.execute("INSERT OR IGNORE INTO matches (name) VALUES (?)", (match_name,))
+        c.execute("SELECT match_id FROM matches WHERE name = ? ORDER BY match_id DESC LIMIT 1", (match_name,))
+        match_id = c.fetchone()[0]
+        
+        # Insert clip for crowd voting
+        c.execute('''
+            INSERT INTO clips (match_id, filename, qc_stage, status, required_tags, is_priority, pre_tag)
+            VALUES (?, ?, 'crowd_voting', 'pending', 10, 1, ?)
+        ''', (match_id, clip_filename, event_type))
+        return c.lastrowid
+
+def _fetch_crowd_status(clip_id: int):
+    """Returns (clip row, vote breakdown), or (None, None) if the clip doesn't exist."""
+    with _db_read_conn() as conn:
+        c = conn.cursor()
+        
+        # Get clip info
+        c.execute('''
+            SELECT c.clip_id, c.filename, c.qc_stage, c.status, c.consensus_event,
+                   (SELECT COUNT(*) FROM tags WHERE clip_id = c.clip_id) as vote_count,
+                   c.required_tags
+            FROM clips c WHERE c.clip_id = ?
+        ''', (clip_id,))
+        row = c.fetchone()
+        
+        if not row:
+            return None, None
+        
+        # Get vote breakdown
+        c.execute('''
+            SELECT event_type, COUNT(*) as count
+            FROM tags WHERE clip_id = ?
+            GROUP BY event_type
+            ORDER BY count DESC
+        ''', (clip_id,))
+        votes = {vote[0]: vote[1] for vote in c.fetchall()}
+    return row, votes
 
 @app.post("/api/crowd/request-review-upload")
 async def request_crowd_review_upload(
@@ -250,17 +474,12 @@ async def request_crowd_review_upload(
         from clip_generator import extract_clip_at_timestamp
         
         # Save uploaded video to temp location with unique name to avoid Windows locks/collisions
-        import uuid
-        temp_uuid = uuid.uuid4().hex[:8]
-        temp_video_path = UPLOADS_DIR / f"temp_{temp_uuid}_{video.filename}"
+        temp_video_path = UPLOADS_DIR / f"temp_{_unique_token()}_{video.filename}"
         
-        with open(temp_video_path, "wb") as buffer:
-            shutil.copyfileobj(video.file, buffer)
+        _save_upload(video, temp_video_path)
         
         # Generate unique clip filename
-        import uuid
-        clip_filename = f"crowd_{int(timestamp_seconds)}_{uuid.uuid4().hex[:8]}.mp4"
-        CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+        clip_filename = f"crowd_{int(timestamp_seconds)}_{_unique_token()}.mp4"
         output_path = CLIPS_DIR / clip_filename
         
         # Extract the clip
@@ -280,18 +499,7 @@ async def request_crowd_review_upload(
             raise HTTPException(status_code=500, detail="Failed to extract clip")
         
         # Add to TactaBot database
-        with sqlite3.connect(TACTABOT_DB) as conn:
-            c = conn.cursor()
-            c.execute("INSERT OR IGNORE INTO matches (name) VALUES (?)", (match_name,))
-            c.execute("SELECT match_id FROM matches WHERE name = ? ORDER BY match_id DESC LIMIT 1", (match_name,))
-            match_id = c.fetchone()[0]
-            
-            c.execute('''
-                INSERT INTO clips (match_id, filename, qc_stage, status, required_tags, is_priority, pre_tag)
-                VALUES (?, ?, 'crowd_voting', 'pending', 10, 1, ?)
-            ''', (match_id, clip_filename, event_type))
-            clip_id = c.lastrowid
-            conn.commit()
+        clip_id = await asyncio.to_thread(_insert_crowd_clip, match_name, clip_filename, event_type)
         
         print(f"✅ Clip added to crowd queue: {clip_filename} (ID: {clip_id})")
         
@@ -333,9 +541,7 @@ async def request_crowd_review(request: CrowdReviewRequest):
             raise HTTPException(status_code=404, detail=f"Video not found: {request.video_path}")
         
         # Generate unique clip filename
-        import uuid
-        clip_filename = f"crowd_{int(request.timestamp_seconds)}_{uuid.uuid4().hex[:8]}.mp4"
-        CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+        clip_filename = f"crowd_{int(request.timestamp_seconds)}_{_unique_token()}.mp4"
         output_path = CLIPS_DIR / clip_filename
         
         # Extract the clip
@@ -351,21 +557,7 @@ async def request_crowd_review(request: CrowdReviewRequest):
             raise HTTPException(status_code=500, detail="Failed to extract clip")
         
         # Add to TactaBot database
-        with sqlite3.connect(TACTABOT_DB) as conn:
-            c = conn.cursor()
-            
-            # Create or get match
-            c.execute("INSERT OR IGNORE INTO matches (name) VALUES (?)", (request.match_name,))
-            c.execute("SELECT match_id FROM matches WHERE name = ? ORDER BY match_id DESC LIMIT 1", (request.match_name,))
-            match_id = c.fetchone()[0]
-            
-            # Insert clip for crowd voting
-            c.execute('''
-                INSERT INTO clips (match_id, filename, qc_stage, status, required_tags, is_priority, pre_tag)
-                VALUES (?, ?, 'crowd_voting', 'pending', 10, 1, ?)
-            ''', (match_id, clip_filename, request.event_type))
-            clip_id = c.lastrowid
-            conn.commit()
+        clip_id = await asyncio.to_thread(_insert_crowd_clip, request.match_name, clip_filename, request.event_type)
         
         print(f"✅ Clip added to crowd queue: {clip_filename} (ID: {clip_id})")
         
@@ -392,29 +584,9 @@ async def request_crowd_review(request: CrowdReviewRequest):
 async def get_crowd_status(clip_id: int):
     """Check the voting status of a clip in the crowd queue."""
     try:
-        with sqlite3.connect(TACTABOT_DB) as conn:
-            c = conn.cursor()
-            
-            # Get clip info
-            c.execute('''
-                SELECT c.clip_id, c.filename, c.qc_stage, c.status, c.consensus_event,
-                       (SELECT COUNT(*) FROM tags WHERE clip_id = c.clip_id) as vote_count,
-                       c.required_tags
-                FROM clips c WHERE c.clip_id = ?
-            ''', (clip_id,))
-            row = c.fetchone()
-            
-            if not row:
-                raise HTTPException(status_code=404, detail=f"Clip not found: {clip_id}")
-            
-            # Get vote breakdown
-            c.execute('''
-                SELECT event_type, COUNT(*) as count
-                FROM tags WHERE clip_id = ?
-                GROUP BY event_type
-                ORDER BY count DESC
-            ''', (clip_id,))
-            votes = {row[0]: row[1] for row in c.fetchall()}
+        row, votes = await asyncio.to_thread(_fetch_crowd_status, clip_id)
+        if not row:
+            raise HTTPException(status_code=404, detail=f"Clip not found: {clip_id}")
             
         return {
             "success": True,
@@ -439,13 +611,21 @@ async def get_crowd_status(clip_id: int):
 @app.get("/api/community/leaderboard")
 async def get_leaderboard():
     try:
-        with sqlite3.connect(TACTABOT_DB) as conn:
+        with _db_read_conn() as conn:
             c = conn.cursor()
-            c.execute("SELECT COALESCE(nickname, username, 'Analyst ' || user_id), xp FROM users ORDER BY xp DESC LIMIT 10")
-            overall = [{"nickname": r[0], "xp": r[1]} for r in c.fetchall()]
-            
-            c.execute("SELECT COALESCE(nickname, username, 'Analyst ' || user_id), monthly_xp FROM users ORDER BY monthly_xp DESC LIMIT 10")
-            monthly = [{"nickname": r[0], "xp": r[1]} for r in c.fetchall()]
+            # Both boards in one statement; each half is an indexed top-10 scan
+            c.execute('''
+                SELECT * FROM (SELECT 'overall', COALESCE(nickname, username, 'Analyst ' || user_id), xp
+                               FROM users ORDER BY xp DESC LIMIT 10)
+                UNION ALL
+                SELECT * FROM (SELECT 'monthly', COALESCE(nickname, username, 'Analyst ' || user_id), monthly_xp
+                               FROM users ORDER BY monthly_xp DESC LIMIT 10)
+                ORDER BY 1 DESC, 3 DESC
+            ''')
+            boards = {"overall": [], "monthly": []}
+            for board, nickname, xp in c.fetchall():
+                boards[board].append({"nickname": nickname, "xp": xp})
+            overall, monthly = boards["overall"], boards["monthly"]
             
         return {"success": True, "overall": overall, "monthly": monthly}
     except Exception as e:
@@ -454,7 +634,7 @@ async def get_leaderboard():
 @app.get("/api/community/clubs")
 async def get_club_rankings():
     try:
-        with sqlite3.connect(TACTABOT_DB) as conn:
+        with _db_read_conn() as conn:
             c = conn.cursor()
             c.execute('''
                 SELECT club, SUM(xp) as total_xp, COUNT(user_id) as members 
@@ -472,7 +652,7 @@ async def get_club_rankings():
 @app.get("/api/community/user/{user_id}")
 async def get_user_stats(user_id: int):
     try:
-        with sqlite3.connect(TACTABOT_DB) as conn:
+        with _db_read_conn() as conn:
             c = conn.cursor()
             c.execute("SELECT COALESCE(nickname, username, 'Analyst ' || user_id), xp, monthly_xp, streak_days, trust_score, club FROM users WHERE user_id = ?", (user_id,))
             row = c.fetchone()
@@ -3,13 +3,21 @@ Flask API Server for Soccer Analysis
 Provides endpoints for video analysis, tracking, and metrics calculation
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 import os
-import json
+import contextlib
+import orjson
 import uuid
+import queue
+import socket
+import sqlite3
 import threading
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import cv2
 import numpy as np
@@ -18,13 +26,36 @@ import numpy as np
 import sys
 sys.path.append(os.path.dirname(__file__))
 
-from detection.fusion_detector import FusionDetector
-from tracking.hybrid_tracker import HybridTracker
-from utils.optical_flow import OpticalFlowEngine
+from utils.optical_flow import OpticalFlowEngine, CachedCameraMotion
 from utils.field_calibration import FieldCalibrator
+from utils.video_utils import open_capture
 from analytics.tactical_analytics import TacticalAnalytics
 
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _numpy_default(obj):
+    """orjson fallback for numpy values it can't serialize natively (e.g. non-contiguous arrays)"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(obj):
+    return orjson.dumps(obj, default=_numpy_default, option=ORJSON_OPTIONS)
+
+
+class ORJSONProvider(JSONProvider):
+    """jsonify() through orjson instead of the stdlib encoder"""
+    def dumps(self, obj, **kwargs):
+        return _dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
 # Configuration
@@ -32,6 +63,14 @@ UPLOAD_FOLDER = 'uploads'
 RESULTS_FOLDER = 'results'
 ALLOWED_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv'}
 MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024  # 2GB
+PIPELINE_QUEUE_SIZE = 8  # Frames buffered between decode, detect and track stages
+PIPELINE_BUFFERS = 2 * PIPELINE_QUEUE_SIZE + 3  # Recycled frame buffers: both queues full plus one per stage
+MAX_JOBS = int(os.getenv('MAX_JOBS', '1'))  # Videos analyzed at once; the rest wait in the executor queue
+CUDA_DEVICES = [x.strip() for x in os.getenv('CUDA_DEVICES', '0').split(',') if x.strip()]
+JOBS_DB = Path(__file__).parent / 'tactabot.db'
+JOB_PROGRESS_EVERY = 30  # Frames between progress writes to the jobs table
+JOB_HEARTBEAT_EVERY = 30  # Seconds between lease renewals for the jobs a worker owns
+JOB_LEASE = 120  # Unfinished jobs whose lease is older than this have lost their worker
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(RESULTS_FOLDER, exist_ok=True)
@@ -40,8 +79,110 @@ app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['RESULTS_FOLDER'] = RESULTS_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
-# Job storage (in production, use Redis or database)
-analysis_jobs = {}
+# Job storage: SQLite so jobs survive restarts and can be read from any worker process.
+# Scalar status fields are columns; the rest (video_path, fps, error) lives in the meta JSON blob.
+with sqlite3.connect(JOBS_DB) as _conn:
+    _conn.execute("PRAGMA journal_mode=WAL")
+    _conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT,
+            progress INT,
+            current_frame INT,
+            total_frames INT,
+            created_at TEXT,
+            meta BLOB,
+            owner TEXT,
+            heartbeat REAL
+        )
+    ''')
+    _columns = {row[1] for row in _conn.execute("PRAGMA table_info(jobs)")}
+    for _name, _type in (('owner', 'TEXT'), ('heartbeat', 'REAL')):
+        if _name not in _columns:
+            _conn.execute(f"ALTER TABLE jobs ADD COLUMN {_name} {_type}")
+    _conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at)")
+    # Jobs whose worker stopped renewing their lease will never finish. Live workers keep
+    # their leases fresh, so a worker (re)starting next to them leaves their jobs alone.
+    _conn.execute("UPDATE jobs SET status = 'failed', meta = json_set(coalesce(meta, '{}'), '$.error', ?) "
+                  "WHERE status IN ('queued', 'processing') AND coalesce(heartbeat, 0) < ?",
+                  ('Interrupted by server restart', time.time() - JOB_LEASE))
+
+# One connection per thread (request handlers and analysis workers), reused across calls
+_db_local = threading.local()
+JOB_COLUMNS = {'status', 'progress', 'current_frame', 'total_frames'}
+
+
+def _jobs_conn():
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = _db_local.conn = sqlite3.connect(JOBS_DB)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")  # Per-connection setting
+    return conn
+
+
+def _worker_id():
+    # Read per call: forked workers inherit the module from the parent process
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _renew_leases():
+    """Keeps this worker's queued and processing jobs from being reclaimed as interrupted"""
+    while True:
+        with _jobs_conn() as conn:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN ('queued', 'processing')",
+                         (time.time(), _worker_id()))
+        time.sleep(JOB_HEARTBEAT_EVERY)
+
+
+_heartbeat_lock = threading.Lock()
+_heartbeat_pid = None
+
+
+def _ensure_heartbeat():
+    """Starts the lease renewal thread once per process (threads don't survive a fork)"""
+    global _heartbeat_pid
+    with _heartbeat_lock:
+        if _heartbeat_pid != os.getpid():
+            _heartbeat_pid = os.getpid()
+            threading.Thread(target=_renew_leases, daemon=True, name='job-heartbeat').start()
+
+
+def _create_job(job_id, video_path):
+    _ensure_heartbeat()
+    with _jobs_conn() as conn:
+        conn.execute(
+            "INSERT INTO jobs (job_id, status, progress, current_frame, total_frames, created_at, meta, "
+            "owner, heartbeat) VALUES (?, 'queued', 0, 0, 0, ?, ?, ?, ?)",
+            (job_id, datetime.now().isoformat(), _dumps({'video_path': video_path}).decode(),
+             _worker_id(), time.time())
+        )
+
+
+def _update_job(job_id, meta=None, **columns):
+    """Sets the given columns; meta keys are merged into the stored meta blob"""
+    assignments = [f"{name} = ?" for name in columns if name in JOB_COLUMNS]
+    params = [value for name, value in columns.items() if name in JOB_COLUMNS]
+    if meta:
+        assignments.append("meta = json_patch(coalesce(meta, '{}'), ?)")
+        params.append(_dumps(meta).decode())
+    with _jobs_conn() as conn:
+        conn.execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE job_id = ?", (*params, job_id))
+
+
+def _get_job(job_id):
+    row = _jobs_conn().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job.update(orjson.loads(job.pop('meta') or b'{}'))
+    return job
+
+# Jobs queue here instead of all fighting over the GPU; each running job leases one device
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_JOBS, thread_name_prefix='analysis')
+_gpu_slots = queue.Queue()
+for _device_idx in CUDA_DEVICES:
+    _gpu_slots.put(_device_idx)
 
 
 def allowed_file(filename):
@@ -49,30 +190,143 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def analyze_video_task(job_id, video_path, calibration_points, models):
+def _read_tracking(tracking_path):
+    """Yields the per-frame tracking dicts from a partial results file: a header line, then one frame per line"""
+    with open(tracking_path, 'rb') as f:
+        next(f, None)
+        for line in f:
+            yield orjson.loads(line.rstrip(b',\n'))
+
+
+def _read_results(job_id):
+    """Raw bytes of a job's results document, so responses can embed it without re-serializing"""
+    result_path = os.path.join(RESULTS_FOLDER, f'{job_id}.json')
+    with open(result_path, 'rb') as f:
+        return f.read()
+
+
+_END = object()  # Marks the end of a pipeline stage's output
+
+
+def _put(q, item, stop):
+    """Blocking put that gives up once the consumer has stopped, so stage threads can't hang"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, stop):
+    """Blocking get that returns _END once the consumer has stopped"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return _END
+
+
+def _decode_stage(cap, q_dec, free_buffers, stop):
+    """
+    Producer thread: (frame_idx, frame) in order, then _END. Frames are decoded into buffers taken
+    from free_buffers, which the consumer hands back once it's done with them.
+    """
+    frame_idx = 0
+    try:
+        while not stop.is_set():
+            buffer = _get(free_buffers, stop)
+            if buffer is _END:
+                return
+            if not cap.grab():
+                break
+            ret, frame = cap.retrieve(buffer)  # Writes into buffer when shape and dtype match
+            if not ret:
+                break
+            if not _put(q_dec, (frame_idx, frame), stop):
+                return
+            frame_idx += 1
+    except Exception as e:
+        _put(q_dec, e, stop)
+        return
+    _put(q_dec, _END, stop)
+
+
+def _detect_stage(detector, q_dec, q_det, stop):
+    """Inference thread: runs on the GPU while the next frames decode and the previous ones track"""
+    while True:
+        item = _get(q_dec, stop)
+        if item is _END or isinstance(item, Exception):
+            _put(q_det, item, stop)
+            return
+        frame_idx, frame = item
+        try:
+            detections = detector.detect(frame)
+        except Exception as e:
+            _put(q_det, e, stop)
+            return
+        if not _put(q_det, (frame_idx, frame, detections), stop):
+            return
+
+
+# Detector and tracker pull in torch/ultralytics, so they're imported on the first job (or
+# /api/warmup) instead of at startup; health-check-only processes never load them
+_heavy_models = {}
+_models_lock = threading.Lock()
+
+
+def _load_models():
+    """Returns (FusionDetector, HybridTracker), importing them once per process"""
+    if not _heavy_models:
+        with _models_lock:
+            if not _heavy_models:
+                from detection.fusion_detector import FusionDetector
+                from tracking.hybrid_tracker import HybridTracker
+                _heavy_models.update(FusionDetector=FusionDetector, HybridTracker=HybridTracker)
+    return _heavy_models['FusionDetector'], _heavy_models['HybridTracker']
+
+
+def _run_analysis_job(job_id, video_path, calibration_points, models, use_cache):
+    """Executor entry point: leases a GPU for CUDA jobs and hands it back when the job ends"""
+    if 'cuda' not in models:
+        return analyze_video_task(job_id, video_path, calibration_points, models, use_cache, device='cpu')
+    device_idx = _gpu_slots.get()
+    try:
+        return analyze_video_task(job_id, video_path, calibration_points, models, use_cache,
+                                  device=f'cuda:{device_idx}')
+    finally:
+        _gpu_slots.put(device_idx)
+
+
+def analyze_video_task(job_id, video_path, calibration_points, models, use_cache=True, device='cpu'):
     """Background task for video analysis"""
+    cap = None
+    tracking_path = None
     try:
         # Update job status
-        analysis_jobs[job_id]['status'] = 'processing'
-        analysis_jobs[job_id]['progress'] = 0
+        _update_job(job_id, status='processing', progress=0)
         
         # Open video
-        cap = cv2.VideoCapture(video_path)
+        cap = open_capture(video_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         fps = cap.get(cv2.CAP_PROP_FPS)
         
-        analysis_jobs[job_id]['total_frames'] = total_frames
-        analysis_jobs[job_id]['fps'] = fps
+        _update_job(job_id, total_frames=total_frames, meta={'fps': fps})
         
         # Initialize components
+        FusionDetector, HybridTracker = _load_models()
         detector = FusionDetector(
             yolo_model='yolov10x.pt',
             rtdetr_model='rtdetr-x.pt',
-            device='cuda' if 'cuda' in models else 'cpu'
+            device=device
         )
         
         tracker = HybridTracker(max_age=30, n_init=3)
         optical_flow = OpticalFlowEngine()
+        resolution = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        camera_motion_track = CachedCameraMotion(optical_flow, video_path, resolution, enabled=use_cache)
         
         # Field calibration
         calibrator = None
@@ -83,72 +337,96 @@ def analyze_video_task(job_id, video_path, calibration_points, models):
         # Analytics
         analytics = TacticalAnalytics()
         
-        # Storage for results
-        tracking_data = []
-        events = []
+        # Frames are streamed one per line straight into the results document, which is finished
+        # in place once the metrics are known, so the tracking data is only ever written once
+        result_path = os.path.join(RESULTS_FOLDER, f'{job_id}.json')
+        tracking_path = result_path + '.part'
         
-        frame_idx = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Detect players and ball
-            detections = detector.detect(frame)
-            
-            # Track
-            tracks = tracker.update(detections, frame)
-            
-            # Optical flow stabilization
-            if frame_idx > 0:
-                flow = optical_flow.compute_flow(prev_frame, frame)
-            
-            # Store tracking data
-            frame_data = {
-                'frame': frame_idx,
-                'timestamp': frame_idx / fps,
-                'players': []
-            }
-            
-            for track in tracks:
-                player_data = {
-                    'id': int(track['id']),
-                    'team': track.get('team', 'TEAM_A'),
-                    'bbox': track['bbox'].tolist(),
-                    'confidence': float(track['confidence'])
-                }
-                
-                # Convert to field coordinates if calibrated
-                if calibrator:
-                    center_x = (track['bbox'][0] + track['bbox'][2]) / 2
-                    center_y = track['bbox'][3]  # Bottom of bbox
-                    field_coords = calibrator.pixel_to_field(center_x, center_y)
-                    player_data['x'] = float(field_coords[0])
-                    player_data['y'] = float(field_coords[1])
+        # Decode -> detect -> track/write run as a three-stage pipeline so the stages overlap.
+        # Each stage is a single thread, so frames stay in order; tracking stays on this thread.
+        q_dec = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        q_det = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        free_buffers = queue.Queue()
+        for _ in range(PIPELINE_BUFFERS):
+            free_buffers.put(np.empty((resolution[1], resolution[0], 3), dtype=np.uint8))
+        stop = threading.Event()
+        stages = [
+            threading.Thread(target=_decode_stage, args=(cap, q_dec, free_buffers, stop), daemon=True),
+            threading.Thread(target=_detect_stage, args=(detector, q_dec, q_det, stop), daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+        
+        try:
+            with open(tracking_path, 'wb', buffering=1 << 20) as tracking_file:
+                tracking_file.write(b'{"tracking":[\n')
+                while True:
+                    item = q_det.get()
+                    if item is _END:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
+                    frame_idx, frame, detections = item
                 
-                frame_data['players'].append(player_data)
+                    # Camera motion for stabilization: sparse LK on background corners, with the
+                    # previous grayscale frame cached inside the engine (or loaded from an earlier run)
+                    camera_motion = camera_motion_track(frame_idx, frame)
             
-            tracking_data.append(frame_data)
+                    # Track, motion-compensated inside the tracker's predict step
+                    tracks = tracker.update(detections, frame, flow=camera_motion)
             
-            # Update progress
-            frame_idx += 1
-            progress = int((frame_idx / total_frames) * 100)
-            analysis_jobs[job_id]['progress'] = progress
-            analysis_jobs[job_id]['current_frame'] = frame_idx
+                    # Store tracking data
+                    players = [
+                        {
+                            'id': int(track['id']),
+                            'team': track.get('team', 'TEAM_A'),
+                            'bbox': track['bbox'], # numpy values are serialized by orjson directly
+                            'confidence': track['confidence']
+                        }
+                        for track in tracks
+                    ]
+                    
+                    # Convert to field coordinates if calibrated, all of the frame's tracks at once
+                    if calibrator and players:
+                        bboxes = np.array([player['bbox'] for player in players], dtype=np.float64)
+                        field_xy = calibrator.pixel_to_field_batch(
+                            (bboxes[:, 0] + bboxes[:, 2]) / 2,
+                            bboxes[:, 3]  # Bottom of bbox
+                        ).tolist()
+                        for player, (field_x, field_y) in zip(players, field_xy):
+                            player['x'] = field_x
+                            player['y'] = field_y
+                    
+                    frame_data = {
+                        'frame': frame_idx,
+                        'timestamp': frame_idx / fps,
+                        'players': players
+                    }
+            
+                    if frame_idx:
+                        tracking_file.write(b',\n')
+                    tracking_file.write(_dumps(frame_data))
+                    free_buffers.put(frame)  # Nothing below reads the pixels, so the decoder can reuse them
             
-            prev_frame = frame.copy()
+                    # Update progress, batched so the jobs table isn't written every frame
+                    if (frame_idx + 1) % JOB_PROGRESS_EVERY == 0:
+                        progress = int(((frame_idx + 1) / total_frames) * 100)
+                        _update_job(job_id, progress=progress, current_frame=frame_idx + 1)
+        finally:
+            stop.set()
+            for stage in stages:
+                stage.join()
         
-        cap.release()
+        camera_motion_track.save()
         
         # Calculate metrics
-        metrics = analytics.calculate_all_metrics(tracking_data)
+        metrics = analytics.calculate_all_metrics(_read_tracking(tracking_path))
         
         # Generate events from tracking data
-        detected_events = analytics.detect_events(tracking_data)
+        detected_events = analytics.detect_events(_read_tracking(tracking_path))
         
-        # Save results
-        results = {
-            'tracking': tracking_data,
+        # Close the tracking array and append the rest of the document
+        meta = {
             'events': detected_events,
             'metrics': metrics,
             'metadata': {
@@ -159,19 +437,22 @@ def analyze_video_task(job_id, video_path, calibration_points, models):
             }
         }
         
-        result_path = os.path.join(RESULTS_FOLDER, f'{job_id}.json')
-        with open(result_path, 'w') as f:
-            json.dump(results, f)
+        with open(tracking_path, 'ab') as f:
+            f.write(b'\n],' + _dumps(meta)[1:])
+        os.replace(tracking_path, result_path)  # Readers only ever see a finished document
         
-        # Update job status
-        analysis_jobs[job_id]['status'] = 'completed'
-        analysis_jobs[job_id]['progress'] = 100
-        analysis_jobs[job_id]['results'] = results
+        # Update job status (results are loaded from disk on request)
+        _update_job(job_id, status='completed', progress=100, current_frame=total_frames)
         
     except Exception as e:
-        analysis_jobs[job_id]['status'] = 'failed'
-        analysis_jobs[job_id]['error'] = str(e)
+        if tracking_path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tracking_path)
+        _update_job(job_id, status='failed', meta={'error': str(e)})
         print(f"Error analyzing video: {e}")
+    finally:
+        if cap is not None:
+            cap.release()
 
 
 @app.route('/api/health', methods=['GET'])
@@ -183,6 +464,16 @@ def health_check():
     })
 
 
+@app.route('/api/warmup', methods=['POST'])
+def warmup():
+    """Import the detection and tracking modules ahead of the first job"""
+    _load_models()
+    return jsonify({
+        'success': True,
+        'models_loaded': sorted(_heavy_models)
+    })
+
+
 @app.route('/api/analyze-video', methods=['POST'])
 def analyze_video():
     """
@@ -192,6 +483,7 @@ def analyze_video():
         - video: Video file
         - calibration: JSON string with 4 calibration points
         - models: JSON array of models to use
+        - no_cache: 'true' to recompute camera motion instead of reusing a previous run's
     """
     # Check if video file is present
     if 'video' not in request.files:
@@ -216,7 +508,7 @@ def analyze_video():
     calibration_points = None
     if 'calibration' in request.form:
         try:
-            calibration_points = json.loads(request.form['calibration'])
+            calibration_points = orjson.loads(request.form['calibration'])
         except:
             pass
     
@@ -224,28 +516,19 @@ def analyze_video():
     models = ['yolov10', 'rtdetr', 'deepsort']
     if 'models' in request.form:
         try:
-            models = json.loads(request.form['models'])
+            models = orjson.loads(request.form['models'])
         except:
             pass
     
+    use_cache = request.form.get('no_cache', 'false').lower() != 'true'
+    
     # Create job
-    analysis_jobs[job_id] = {
-        'id': job_id,
-        'status': 'queued',
-        'progress': 0,
-        'video_path': video_path,
-        'created_at': datetime.now().isoformat(),
-        'current_frame': 0,
-        'total_frames': 0
-    }
+    _create_job(job_id, video_path)
     
-    # Start analysis in background thread
-    thread = threading.Thread(
-        target=analyze_video_task,
-        args=(job_id, video_path, calibration_points, models)
+    # Queue analysis on the job pool
+    EXECUTOR.submit(
+        _run_analysis_job, job_id, video_path, calibration_points, models, use_cache
     )
-    thread.daemon = True
-    thread.start()
     
     return jsonify({
         'success': True,
@@ -257,11 +540,10 @@ def analyze_video():
 @app.route('/api/analysis-status/<job_id>', methods=['GET'])
 def get_analysis_status(job_id):
     """Get status of analysis job"""
-    if job_id not in analysis_jobs:
+    job = _get_job(job_id)
+    if job is None:
         return jsonify({'error': 'Job not found'}), 404
     
-    job = analysis_jobs[job_id]
-    
     response = {
         'job_id': job_id,
         'status': job['status'],
@@ -271,7 +553,9 @@ def get_analysis_status(job_id):
     }
     
     if job['status'] == 'completed':
-        response['results'] = job.get('results')
+        # Splice the stored document in as-is rather than parsing and re-encoding it
+        body = _dumps(response)[:-1] + b',"results":' + _read_results(job_id) + b'}'
+        return Response(body, mimetype='application/json')
     elif job['status'] == 'failed':
         response['error'] = job.get('error')
     
@@ -322,23 +606,25 @@ def get_results(job_id):
     if not os.path.exists(result_path):
         return jsonify({'error': 'Results not found'}), 404
     
-    with open(result_path, 'r') as f:
-        results = json.load(f)
-    
-    return jsonify(results)
+    return Response(_read_results(job_id), mimetype='application/json')
 
 
 @app.route('/api/jobs', methods=['GET'])
 def list_jobs():
-    """List all analysis jobs"""
-    jobs = []
-    for job_id, job in analysis_jobs.items():
-        jobs.append({
-            'id': job_id,
-            'status': job['status'],
-            'progress': job['progress'],
-            'created_at': job['created_at']
-        })
+    """List all analysis jobs, optionally filtered with ?status="""
+    status = request.args.get('status')
+    if status:
+        rows = _jobs_conn().execute(
+            "SELECT job_id, status, progress, created_at FROM jobs WHERE status = ? ORDER BY created_at",
+            (status,)
+        )
+    else:
+        rows = _jobs_conn().execute("SELECT job_id, status, progress, created_at FROM jobs ORDER BY created_at")
+    
+    jobs = [
+        {'id': job_id, 'status': job_status, 'progress': progress, 'created_at': created_at}
+        for job_id, job_status, progress, created_at in rows
+    ]
     
     return jsonify({'jobs': jobs})
 
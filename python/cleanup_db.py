@@ -4,6 +4,7 @@ import os
 DB_PATH = 'python/tactabot.db'
 
 conn = sqlite3.connect(DB_PATH)
+conn.execute("PRAGMA journal_mode=WAL") # Bot and API keep reading while we delete
 c = conn.cursor()
 
 # Show current clips
@@ -13,7 +14,7 @@ for row in c.fetchall():
     print(f"  ID {row[0]}: Match {row[1]} - {row[2]}")
 
 # Delete dummy HTTP clips
-c.execute('DELETE FROM clips WHERE video_path LIKE "http%"')
+c.execute('DELETE FROM clips WHERE video_path LIKE ?', ('http%',))
 deleted = c.rowcount
 conn.commit()
 
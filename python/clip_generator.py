@@ -4,10 +4,41 @@ import random
 import logging
 import subprocess
 import shutil
+import json
+import functools
+
+try:
+    import av # PyAV: in-process packet remux when the ffmpeg CLI isn't installed
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+X264_ARGS = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '23']
+NVENC_ARGS = ['-c:v', 'h264_nvenc', '-preset', 'p4', '-rc', 'vbr', '-cq', '23'] # Roughly x264 crf 23 quality
+AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '128k']
+NVENC_MAX_SESSIONS = 3 # Concurrent encodes consumer GeForce drivers allow; NVENC runs are chunked to this
+GRAB_SEEK_MAX_SECONDS = 5 # Gaps up to this long are decoded through; longer ones seek to a keyframe
+
+
+@functools.lru_cache(maxsize=None)
+def nvenc_available() -> bool:
+    """Whether this ffmpeg build has the NVENC H.264 encoder (checked once per process)."""
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return 'h264_nvenc' in result.stdout
+
+
+def _encode_args(nvenc: bool) -> tuple[list, list]:
+    """(input args, output codec args) for a re-encode, on the GPU's NVENC block or with libx264."""
+    if nvenc:
+        return ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'], NVENC_ARGS + AUDIO_ARGS
+    return [], X264_ARGS + AUDIO_ARGS
+
 
 def extract_clip_at_timestamp(video_path: str, output_path: str, timestamp_seconds: float, window_seconds: float = 10.0) -> str | None:
     """
@@ -34,40 +65,43 @@ def extract_clip_at_timestamp(video_path: str, output_path: str, timestamp_secon
 
     start_time = max(0, timestamp_seconds - (window_seconds / 2))
     
-    # FFMPEG command for fast and accurate extraction
-    # -ss before -i for fast seeking, -t for duration
-    cmd = [
-        'ffmpeg',
-        '-y',  # Overwrite output
-        '-ss', str(start_time),
-        '-i', video_path,
-        '-t', str(window_seconds),
-        '-c:v', 'libx264',  # Re-encode for compatibility
-        '-preset', 'fast',
-        '-crf', '23',
-        '-c:a', 'aac',
-        '-b:a', '128k',
-        '-movflags', '+faststart',
-        output_path
-    ]
+    # Re-encode for compatibility, on NVENC when available (libx264 if that run fails)
+    encoders = [True, False] if nvenc_available() else [False]
+    for nvenc in encoders:
+        input_args, codec_args = _encode_args(nvenc)
+        # FFMPEG command for fast and accurate extraction
+        # -ss before -i for fast seeking, -t for duration
+        cmd = [
+            'ffmpeg',
+            '-y',  # Overwrite output
+            *input_args,
+            '-ss', str(start_time),
+            '-i', video_path,
+            '-t', str(window_seconds),
+            *codec_args,
+            '-movflags', '+faststart',
+            output_path
+        ]
 
-    try:
-        logging.info(f"Extracting clip: {start_time:.2f}s to {start_time + window_seconds:.2f}s")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-        
-        if result.returncode != 0:
-            logging.error(f"FFMPEG error: {result.stderr}")
-            return None
+        try:
+            logging.info(f"Extracting clip: {start_time:.2f}s to {start_time + window_seconds:.2f}s"
+                         f" ({'h264_nvenc' if nvenc else 'libx264'})")
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
             
-        logging.info(f"Successfully extracted clip to: {output_path}")
-        return output_path
-        
-    except subprocess.TimeoutExpired:
-        logging.error("FFMPEG timed out during extraction.")
-        return None
-    except Exception as e:
-        logging.error(f"Error during clip extraction: {e}")
-        return None
+            if result.returncode != 0:
+                logging.error(f"FFMPEG error: {result.stderr}")
+                continue
+                
+            logging.info(f"Successfully extracted clip to: {output_path}")
+            return output_path
+            
+        except subprocess.TimeoutExpired:
+            logging.error("FFMPEG timed out during extraction.")
+            return None
+        except Exception as e:
+            logging.error(f"Error during clip extraction: {e}")
+            return None
+    return None
 
 
 def _extract_clip_opencv(video_path: str, output_path: str, timestamp_seconds: float, window_seconds: float) -> str | None:
@@ -105,9 +139,198 @@ def _extract_clip_opencv(video_path: str, output_path: str, timestamp_seconds: f
         return output_path
     return None
 
+def probe_video(video_path: str) -> tuple[float, int] | None:
+    """Returns (fps, total_frames) from the container metadata via ffprobe, without decoding anything."""
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'stream=avg_frame_rate,nb_frames,duration:format=duration',
+        '-of', 'json',
+        video_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        info = json.loads(result.stdout)
+        stream = info['streams'][0]
+    except Exception as e:
+        logging.error(f"ffprobe failed: {e}")
+        return None
+
+    num, _, den = stream.get('avg_frame_rate', '0/1').partition('/')
+    try:
+        fps = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        fps = 0.0
+    if fps == 0: fps = 30.0
+
+    # nb_frames is missing for some containers (e.g. mkv); fall back to duration * fps
+    if str(stream.get('nb_frames', '')).isdigit():
+        total_frames = int(stream['nb_frames'])
+    else:
+        duration = stream.get('duration') or info.get('format', {}).get('duration') or 0
+        total_frames = int(float(duration) * fps)
+    return fps, total_frames
+
+
+def _run_clips_ffmpeg(video_path: str, clips: list, input_args: list, codec_args: list) -> bool:
+    """One ffmpeg run writing every clip, each cut from its own seeked input."""
+    cmd = ['ffmpeg', '-y']
+    for start_time, duration, _ in clips:
+        cmd += [*input_args, '-ss', f"{start_time:.3f}", '-t', f"{duration:.3f}", '-i', video_path]
+    for i, (_, _, output_path) in enumerate(clips):
+        cmd += ['-map', f"{i}:v:0", '-map', f"{i}:a?", *codec_args,
+                '-avoid_negative_ts', 'make_zero', '-movflags', '+faststart', output_path]
+
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+    except subprocess.TimeoutExpired:
+        logging.error("FFMPEG timed out during clip generation.")
+        return False
+
+    if result.returncode != 0:
+        logging.error(f"FFMPEG error: {result.stderr}")
+        return False
+    return True
+
+
+def write_clips_ffmpeg(video_path: str, clips: list, reencode: bool = False) -> bool:
+    """
+    Cuts every (start_time, duration, output_path) clip in a single ffmpeg run by stream copy.
+    Each clip is its own seeked input, so nothing is decoded or re-encoded.
+    With reencode=True the clips are transcoded instead: on NVENC in runs of at most
+    NVENC_MAX_SESSIONS clips when available, switching to libx264 if an NVENC run fails.
+    """
+    if not reencode:
+        return _run_clips_ffmpeg(video_path, clips, [], ['-c', 'copy'])
+
+    nvenc = nvenc_available()
+    done = 0
+    while done < len(clips):
+        # Every output is its own NVDEC/NVENC session, so GPU runs are kept under the session limit
+        batch = clips[done:done + NVENC_MAX_SESSIONS] if nvenc else clips[done:]
+        if _run_clips_ffmpeg(video_path, batch, *_encode_args(nvenc)):
+            done += len(batch)
+        elif nvenc:
+            logging.warning("NVENC encode failed, retrying with libx264.")
+            nvenc = False
+        else:
+            return False
+    return True
+
+
+def write_clips_opencv(cap, clips: list, fps: float):
+    """
+    Fallback: decodes and re-encodes each clip with OpenCV (mp4v).
+    Clips are cut in start order with one forward cursor: short gaps are skipped with grab(), which
+    decodes without the BGR conversion, and only long jumps or overlaps pay for a keyframe seek.
+    """
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    max_grab_gap = int(fps * GRAB_SEEK_MAX_SECONDS)
+
+    current_frame = 0
+    buffer = None # Reused decode target; VideoWriter copies each frame it's given
+    for start_time, duration, output_path in sorted(clips):
+        start_frame = int(start_time * fps)
+        end_frame = int((start_time + duration) * fps)
+        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+
+        gap = start_frame - current_frame
+        if gap < 0 or gap > max_grab_gap:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            current_frame = start_frame
+        while current_frame < start_frame and cap.grab():
+            current_frame += 1
+
+        while current_frame < end_frame and cap.grab():
+            ret, buffer = cap.retrieve(buffer)
+            if not ret:
+                break
+            out.write(buffer)
+            current_frame += 1
+
+        out.release()
+
+
+def unique_clip_path(output_dir: str, start_time: float, taken: set) -> str:
+    """
+    clip_<second>_<random>.mp4, redrawn until it isn't in taken (the paths already chosen for this run).
+    Every clip is written by the same ffmpeg run, where two outputs with one path would share a file.
+    """
+    while True:
+        path = os.path.join(output_dir, f"clip_{int(start_time)}_{random.randint(1000,9999)}.mp4")
+        if path not in taken:
+            taken.add(path)
+            return path
+
+
+def write_clips_pyav(video_path: str, clips: list) -> bool:
+    """
+    Stream-copies the video track of every (start_time, duration, output_path) clip with PyAV:
+    seek to the keyframe before each start, then remux packets until the end time. Nothing is decoded.
+    """
+    try:
+        with av.open(video_path) as container:
+            vs = container.streams.video[0]
+            for start_time, duration, output_path in sorted(clips):
+                container.seek(int(start_time / vs.time_base), stream=vs, any_frame=False, backward=True)
+                end_pts = (start_time + duration) / vs.time_base
+                with av.open(output_path, 'w') as output:
+                    # PyAV 14 moved template streams to their own method
+                    if hasattr(output, 'add_stream_from_template'):
+                        out_stream = output.add_stream_from_template(vs)
+                    else:
+                        out_stream = output.add_stream(template=vs)
+                    offset = None
+                    for packet in container.demux(vs):
+                        if packet.dts is None: # Demuxer flush packet
+                            continue
+                        if packet.pts is not None and packet.pts >= end_pts:
+                            break
+                        if offset is None:
+                            offset = packet.dts # Shift the clip to start at zero, like -avoid_negative_ts
+                        packet.dts -= offset
+                        if packet.pts is not None:
+                            packet.pts -= offset
+                        packet.stream = out_stream
+                        output.mux(packet)
+    except Exception as e:
+        logging.error(f"PyAV remux failed: {e}")
+        return False
+    return True
+
+
+def write_clips(video_path: str, clips: list, fps: float, cap=None) -> bool:
+    """
+    Writes every (start_time, duration, output_path) clip, cheapest method first: ffmpeg stream copy,
+    ffmpeg re-encode, PyAV remux (no ffmpeg CLI), then OpenCV re-encode. Releases cap if one is given.
+    """
+    try:
+        if shutil.which('ffmpeg'):
+            if write_clips_ffmpeg(video_path, clips) or write_clips_ffmpeg(video_path, clips, reencode=True):
+                return True
+            logging.warning("FFMPEG failed, falling back.")
+        if PYAV_AVAILABLE and write_clips_pyav(video_path, clips):
+            return True
+
+        logging.info("Re-encoding clips with OpenCV.")
+        if cap is None:
+            cap = cv2.VideoCapture(video_path)
+            if not cap.isOpened():
+                logging.error("Could not open video.")
+                return False
+        write_clips_opencv(cap, clips, fps)
+        return True
+    finally:
+        if cap is not None:
+            cap.release()
+
+
 def generate_clips_from_video(video_path, output_dir, num_clips=5, min_duration=5, max_duration=12):
     """
-    Generates random clips from a video file using OpenCV.
+    Generates random clips from a video file.
+    Clips are stream-copied with FFMPEG (or PyAV) when available, otherwise re-encoded with OpenCV.
     Each clip has a random duration between min_duration and max_duration seconds.
     Returns a list of paths to the generated clips.
     """
@@ -117,18 +340,23 @@ def generate_clips_from_video(video_path, output_dir, num_clips=5, min_duration=
 
     os.makedirs(output_dir, exist_ok=True)
     
-    generated_clips = []
     logging.info(f"Generating {num_clips} clips from {video_path}...")
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        logging.error("Could not open video.")
-        return []
+    use_ffmpeg = bool(shutil.which('ffmpeg') and shutil.which('ffprobe'))
+    probe = probe_video(video_path) if use_ffmpeg else None
+    cap = None
+    if probe:
+        fps, total_frames = probe
+    else:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            logging.error("Could not open video.")
+            return []
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     
-    if fps == 0: fps = 30.0
+        if fps == 0: fps = 30.0
     
     # Calculate num_clips dynamically if requested
     if num_clips == -1:
@@ -144,6 +372,8 @@ def generate_clips_from_video(video_path, output_dir, num_clips=5, min_duration=
         if num_clips < 1:
             num_clips = 1
 
+    clips = []
+    taken = set()
     for i in range(num_clips):
         # Random clip duration between min and max
         clip_duration = random.uniform(min_duration, max_duration)
@@ -155,31 +385,19 @@ def generate_clips_from_video(video_path, output_dir, num_clips=5, min_duration=
             continue
             
         start_time = random.uniform(0, max_start_time)
-        start_frame = int(start_time * fps)
-        end_frame = int((start_time + clip_duration) * fps)
-        
-        clip_name = f"clip_{int(start_time)}_{random.randint(1000,9999)}.mp4"
-        output_path = os.path.join(output_dir, clip_name)
-        
-        # Setup VideoWriter
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
         
-        current_frame = start_frame
-        while current_frame < end_frame and cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            out.write(frame)
-            current_frame += 1
-            
-        out.release()
-        logging.info(f"Generated: {clip_name}")
-        generated_clips.append(output_path)
+        clips.append((start_time, clip_duration, unique_clip_path(output_dir, start_time, taken)))
 
-    cap.release()
+    if not clips:
+        if cap is not None:
+            cap.release()
+        return []
+
+    if not write_clips(video_path, clips, fps, cap):
+        return []
+
+    generated_clips = []
+    for _, _, output_path in clips:
+        logging.info(f"Generated: {os.path.basename(output_path)}")
+        generated_clips.append(output_path)
     return generated_clips
@@ -7,37 +7,92 @@ Outputs position data as JSON for heatmap generation.
 import cv2
 import json
 import argparse
+import functools
 import sys
 from pathlib import Path
 import numpy as np
+from utils.video_utils import open_capture
 
 try:
+    import torch
     from ultralytics import YOLO
+    from utils.model_input import to_model_tensor
 except ImportError:
     print("ERROR: ultralytics not installed. Run: pip install ultralytics", file=sys.stderr)
     sys.exit(1)
 
 
+
+@functools.lru_cache(maxsize=4)
+def _get_model(name):
+    """Loads (and Conv+BN fuses) a YOLO model once per process, so repeated calls reuse the weights"""
+    model = YOLO(name)
+    model.fuse()
+    return model
+
+
 def estimate_team(x, y, frame_width, frame_height):
     """
     Estimate team based on field position.
     Simple heuristic: left half = Team A, right half = Team B
     
     Args:
-        x, y: Player position in pixels
+        x, y: Player position in pixels (scalars or arrays)
         frame_width, frame_height: Video dimensions
     
     Returns:
-        'A' or 'B'
+        'A' or 'B' (a list of them for array input)
     """
     # Normalize x position (0-100)
-    x_normalized = (x / frame_width) * 100
+    x_normalized = (np.asarray(x) / frame_width) * 100
     
     # Simple split: left half vs right half
-    return 'A' if x_normalized < 50 else 'B'
+    return np.where(x_normalized < 50, 'A', 'B').tolist()
+
+
+def _gpu_batch_input(frames):
+    """
+    Same-size BGR uint8 frames -> normalized RGB (N, 3, H, W) FP16 CUDA tensor at a stride multiple,
+    uploaded in one copy. Returns the tensor and the (sx, sy) factors that map boxes back onto the frames.
+    """
+    return to_model_tensor(torch.from_numpy(np.stack(frames)).to('cuda').permute(0, 3, 1, 2))
+
+
+def _batch_detections(results):
+    """
+    Per-frame Boxes.data rows (x1, y1, x2, y2, conf, cls) for a whole batch, brought to the host
+    in one device->host copy. Row counts come from tensor shapes, so nothing syncs per frame.
+    """
+    packed = torch.cat([result.boxes.data for result in results]).cpu().numpy()
+    ends = np.cumsum([len(result.boxes) for result in results]).tolist()
+    return np.split(packed, ends[:-1])
+
+
+def detections_to_positions(data, frame_ids, timestamps, frame_width, frame_height):
+    """
+    Convert every kept detection of the run (stacked Boxes.data rows, with the frame number and
+    timestamp of each row) to position dictionaries in one vectorized pass.
+    """
+    # Bounding box centers, normalized to 0-100 scale
+    center_x = (data[:, 0] + data[:, 2]) / 2
+    center_y = (data[:, 1] + data[:, 3]) / 2
+    x_norm = np.round(((center_x / frame_width) * 100).astype(np.float64), 2).tolist()
+    y_norm = np.round(((center_y / frame_height) * 100).astype(np.float64), 2).tolist()
+    conf = np.round(data[:, 4].astype(np.float64), 2).tolist()
+    teams = estimate_team(center_x, center_y, frame_width, frame_height)
+    
+    return [{
+        'frame': frame,
+        'timestamp': timestamp,
+        'x': x,
+        'y': y,
+        'team': team,
+        'confidence': c
+    } for frame, timestamp, x, y, team, c in zip(frame_ids.tolist(), timestamps.tolist(), x_norm, y_norm, teams, conf)]
 
 
-def extract_positions(video_path, output_path, frame_skip=5, confidence_threshold=0.5, start_time=0, end_time=None):
+def extract_positions(video_path, output_path, frame_skip=5, confidence_threshold=0.5, start_time=0, end_time=None,
+                      batch_size=16):
     """
     Extract player positions from video using YOLO detection.
     
@@ -48,12 +103,13 @@ def extract_positions(video_path, output_path, frame_skip=5, confidence_threshol
         confidence_threshold: Minimum detection confidence (default: 0.5)
         start_time: Start time in seconds (default: 0)
         end_time: End time in seconds (default: None, meaning end of video)
+        batch_size: Sampled frames sent to YOLO per call (default: 16)
     
     Returns:
         List of position dictionaries
     """
     print(f"Loading video: {video_path}")
-    cap = cv2.VideoCapture(str(video_path))
+    cap = open_capture(video_path)
     
     if not cap.isOpened():
         print(f"ERROR: Could not open video file: {video_path}", file=sys.stderr)
@@ -104,69 +160,73 @@ def extract_positions(video_path, output_path, frame_skip=5, confidence_threshol
     
     # Load YOLO model (using YOLOv8n for speed)
     print("Loading YOLO model...")
-    model = YOLO('yolov8n.pt')  # Nano model for speed
+    model = _get_model('yolov8n.pt')  # Nano model for speed
     
-    positions = []
     processed_count = 0
+    batch, batch_meta = [], [] # sampled frames and their (frame_count, timestamp)
+    kept, kept_frames, kept_times = [], [], [] # per-frame detections, normalized once after the loop
     
-    while frame_count < end_frame:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    def run_batch():
+        nonlocal processed_count
+        # Run YOLO detection on the whole batch (half precision is ignored on CPU). On CUDA the
+        # frames are resized and normalized on the GPU instead of by Ultralytics' CPU preprocessing
+        box_scale = None
+        if torch.cuda.is_available():
+            source, (sx, sy) = _gpu_batch_input(batch)
+            box_scale = np.array([sx, sy, sx, sy], dtype=np.float32)
+        else:
+            source = batch
+        results = model(source, classes=[0], verbose=False, half=True)  # class 0 = person
         
-        # Only process every Nth frame
+        # Extract detections; confidence filtering happens on the host, since a boolean mask on
+        # the GPU would sync once per frame
+        for data, (batch_frame, timestamp) in zip(_batch_detections(results), batch_meta):
+            data = data[data[:, 4] >= confidence_threshold]
+            if box_scale is not None:
+                data[:, :4] *= box_scale
+            kept.append(data)
+            kept_frames.append(np.full(len(data), batch_frame, dtype=np.int64))
+            kept_times.append(np.full(len(data), round(timestamp, 2)))
+            processed_count += 1
+            
+            # Progress update every 100 processed frames
+            if processed_count % 100 == 0:
+                progress = ((batch_frame - start_frame) / (end_frame - start_frame)) * 100
+                print(f"Progress: {progress:.1f}% ({batch_frame}/{end_frame} frames)", file=sys.stderr)
+        batch.clear()
+        batch_meta.clear()
+    
+    while frame_count < end_frame:
+        # Only process every Nth frame. Skipped frames are still decoded (later frames depend on
+        # them) but only grabbed, so they never pay for the BGR conversion and copy of read()
         if frame_count % frame_skip != 0:
+            if not cap.grab():
+                break
             frame_count += 1
             continue
         
-        # Calculate timestamp
-        timestamp = frame_count / fps
-        
-        # Run YOLO detection
-        results = model(frame, classes=[0], verbose=False)  # class 0 = person
-        
-        # Extract detections
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # Get confidence
-                conf = float(box.conf[0])
-                if conf < confidence_threshold:
-                    continue
-                
-                # Get bounding box center
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                center_x = (x1 + x2) / 2
-                center_y = (y1 + y2) / 2
-                
-                # Normalize to 0-100 scale
-                x_norm = float((center_x / frame_width) * 100)
-                y_norm = float((center_y / frame_height) * 100)
-                
-                # Estimate team
-                team = estimate_team(center_x, center_y, frame_width, frame_height)
-                
-                # Add position data
-                positions.append({
-                    'frame': frame_count,
-                    'timestamp': round(timestamp, 2),
-                    'x': round(x_norm, 2),
-                    'y': round(y_norm, 2),
-                    'team': team,
-                    'confidence': round(conf, 2)
-                })
-        
-        processed_count += 1
+        ret, frame = cap.read()
+        if not ret:
+            break
         
-        # Progress update every 100 processed frames
-        if processed_count % 100 == 0:
-            progress = ((frame_count - start_frame) / (end_frame - start_frame)) * 100
-            print(f"Progress: {progress:.1f}% ({frame_count}/{end_frame} frames)", file=sys.stderr)
+        batch.append(frame)
+        batch_meta.append((frame_count, frame_count / fps))
+        if len(batch) == batch_size:
+            run_batch()
         
         frame_count += 1
     
+    if batch:
+        run_batch()
+    
     cap.release()
     
+    if kept:
+        positions = detections_to_positions(np.concatenate(kept), np.concatenate(kept_frames),
+                                            np.concatenate(kept_times), frame_width, frame_height)
+    else:
+        positions = []
+    
     print(f"\nExtracted {len(positions)} player positions from {processed_count} frames")
     
     # Save to JSON
@@ -199,6 +259,7 @@ def main():
     parser.add_argument('--confidence', type=float, default=0.5, help='Minimum detection confidence (default: 0.5)')
     parser.add_argument('--start-time', type=float, default=0, help='Start time in seconds (default: 0)')
     parser.add_argument('--end-time', type=float, default=None, help='End time in seconds (default: end of video)')
+    parser.add_argument('--batch-size', type=int, default=16, help='Frames per YOLO call (default: 16)')
     
     args = parser.parse_args()
     
@@ -216,7 +277,8 @@ def main():
             frame_skip=args.frame_skip,
             confidence_threshold=args.confidence,
             start_time=args.start_time,
-            end_time=args.end_time
+            end_time=args.end_time,
+            batch_size=args.batch_size
         )
     except Exception as e:
         print(f"ERROR: {str(e)}", file=sys.stderr)
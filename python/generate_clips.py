@@ -1,8 +1,9 @@
-import json
+import orjson
 import os
 import subprocess
 import random
 import sqlite3
+import shutil
 import logging
 
 # Setup logging
@@ -15,6 +16,7 @@ CLIPS_DIR = os.path.join(BASE_DIR, 'public', 'clips')
 DB_PATH = os.path.join(os.path.dirname(__file__), 'tactabot.db')
 
 import cv2
+from clip_generator import probe_video, unique_clip_path, write_clips
 
 def generate_clips():
     # 1. Load Analysis Results
@@ -22,8 +24,8 @@ def generate_clips():
         logging.error(f"Analysis file not found: {ANALYSIS_FILE}")
         return
 
-    with open(ANALYSIS_FILE, 'r') as f:
-        data = json.load(f)
+    with open(ANALYSIS_FILE, 'rb') as f:
+        data = orjson.loads(f.read())
 
     video_path = data.get('metadata', {}).get('video_path')
     if not video_path or not os.path.exists(video_path):
@@ -45,54 +47,41 @@ def generate_clips():
     # 2. Create Clips Directory
     os.makedirs(CLIPS_DIR, exist_ok=True)
 
-    # 3. Generate Random Clips using OpenCV
+    # 3. Generate Random Clips, stream-copied with FFMPEG or PyAV (OpenCV re-encode if neither is available)
     duration = data.get('metadata', {}).get('duration', 60)
     num_clips = 5
     clip_duration = 4 # seconds
-    
-    generated_clips = []
-
-    logging.info(f"Generating {num_clips} clips from {video_path} using OpenCV...")
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        logging.error("Could not open video.")
-        return
+    use_ffmpeg = bool(shutil.which('ffmpeg') and shutil.which('ffprobe'))
+    probe = probe_video(video_path) if use_ffmpeg else None
+    cap = None
+    if probe:
+        fps, total_frames = probe
+    else:
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            logging.error("Could not open video.")
+            return
 
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     
-    if fps == 0: fps = 30.0
+        if fps == 0: fps = 30.0
 
+    logging.info(f"Generating {num_clips} clips from {video_path}...")
+
+    clips = []
+    taken = set()
     for i in range(num_clips):
         start_time = random.uniform(0, (total_frames / fps) - clip_duration - 1)
-        start_frame = int(start_time * fps)
-        end_frame = int((start_time + clip_duration) * fps)
-        
-        clip_name = f"clip_{int(start_time)}.mp4"
-        output_path = os.path.join(CLIPS_DIR, clip_name)
-        
-        # Setup VideoWriter
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-        
-        current_frame = start_frame
-        while current_frame < end_frame and cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            out.write(frame)
-            current_frame += 1
-            
-        out.release()
-        logging.info(f"Generated: {clip_name}")
-        generated_clips.append(output_path)
-
-    cap.release()
+        clips.append((start_time, clip_duration, unique_clip_path(CLIPS_DIR, start_time, taken)))
+
+    if not write_clips(video_path, clips, fps, cap):
+        return
+
+    generated_clips = [output_path for _, _, output_path in clips]
+    for output_path in generated_clips:
+        logging.info(f"Generated: {os.path.basename(output_path)}")
 
     # 4. Update Database
     if generated_clips:
@@ -100,6 +89,9 @@ def generate_clips():
 
 def update_db(clip_paths):
     conn = sqlite3.connect(DB_PATH)
+    # WAL keeps the bot's readers unblocked; NORMAL skips the per-commit fsync (per connection)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
     c = conn.cursor()
     
     # Ensure match exists
@@ -111,11 +103,9 @@ def update_db(clip_paths):
     else:
         match_id = match[0]
 
-    # Insert clips
-    for path in clip_paths:
-        # We store the absolute path for the bot to send
-        c.execute("INSERT INTO clips (match_id, video_path, correct_event) VALUES (?, ?, ?)", 
-                  (match_id, path, "Unknown"))
+    # Insert clips (we store the absolute path for the bot to send)
+    c.executemany("INSERT INTO clips (match_id, video_path, correct_event) VALUES (?, ?, ?)",
+                  [(match_id, path, "Unknown") for path in clip_paths])
     
     conn.commit()
     conn.close()
@@ -4,14 +4,77 @@ Generate player heatmap from position data.
 Creates a visual heatmap overlaid on a soccer field.
 """
 
-import json
+import orjson
 import argparse
 import sys
 from pathlib import Path
 import numpy as np
+import matplotlib
+matplotlib.use('Agg') # Headless rendering; no GUI backend is ever needed here
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle, Arc, Circle
-from scipy.ndimage import gaussian_filter
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.colors import LinearSegmentedColormap
+from scipy.ndimage import gaussian_filter1d
+
+POSITION_DTYPE = np.dtype([('x', 'f8'), ('y', 'f8'), ('team', 'U1')])
+GAUSSIAN_TRUNCATE = 3.0 # Kernel radius in sigmas; the tail past 3 sigma is invisible on the plot
+
+# Dark team colormaps (much more saturated), built once per process
+CMAP_RED = LinearSegmentedColormap.from_list(
+    'dark_red', ['#ffffff', '#ff6666', '#ff0000', '#cc0000', '#990000', '#660000'], N=100)
+CMAP_BLUE = LinearSegmentedColormap.from_list(
+    'dark_blue', ['#ffffff', '#6666ff', '#0000ff', '#0000cc', '#000099', '#000066'], N=100)
+
+# Field dimensions (normalized 0-100)
+FIELD_LENGTH = 100
+FIELD_WIDTH = 100
+PENALTY_AREA = (16.5, 40.3) # length, width
+GOAL_AREA = (5.5, 18.32)
+# Outer boundary and halfway line, as (start, end) segments
+FIELD_LINES = np.array([
+    [(0, 0), (0, FIELD_WIDTH)],
+    [(0, FIELD_WIDTH), (FIELD_LENGTH, FIELD_WIDTH)],
+    [(FIELD_LENGTH, FIELD_WIDTH), (FIELD_LENGTH, 0)],
+    [(FIELD_LENGTH, 0), (0, 0)],
+    [(FIELD_LENGTH / 2, 0), (FIELD_LENGTH / 2, FIELD_WIDTH)],
+])
+# Center and penalty spots
+FIELD_SPOTS = np.array([(FIELD_LENGTH / 2, FIELD_WIDTH / 2), (11, FIELD_WIDTH / 2), (FIELD_LENGTH - 11, FIELD_WIDTH / 2)])
+
+
+def _field_outlines():
+    """Center circle plus penalty and goal areas (patches can't be shared between figures)"""
+    outlines = [Circle((FIELD_LENGTH / 2, FIELD_WIDTH / 2), 9.15)]
+    for length, width in (PENALTY_AREA, GOAL_AREA):
+        outlines.append(Rectangle((0, (FIELD_WIDTH - width) / 2), length, width))
+        outlines.append(Rectangle((FIELD_LENGTH - length, (FIELD_WIDTH - width) / 2), length, width))
+    return outlines
+
+
+def load_positions(records):
+    """Position dicts -> structured array with x, y and team fields, in one pass over the JSON list"""
+    return np.array([(p['x'], p['y'], p['team']) for p in records], dtype=POSITION_DTYPE)
+
+
+def bin_positions(x, y, bins):
+    """
+    2D histogram of 0-100 coordinates, same as np.histogram2d with range [[0, 100], [0, 100]]
+    (right edge inclusive, points outside dropped), counted with one bincount pass.
+    """
+    inside = (x >= 0) & (x <= 100) & (y >= 0) & (y <= 100)
+    ix = np.minimum((x[inside] * bins / 100).astype(np.int32), bins - 1)
+    iy = np.minimum((y[inside] * bins / 100).astype(np.int32), bins - 1)
+    return np.bincount(ix * bins + iy, minlength=bins * bins).reshape(bins, bins)
+
+
+def smooth_heatmap(heatmap, sigma):
+    """
+    Gaussian-smooths a 2D histogram as two 1-D passes (one per axis) in float32.
+    """
+    heatmap = heatmap.astype(np.float32)
+    heatmap = gaussian_filter1d(heatmap, sigma, axis=0, truncate=GAUSSIAN_TRUNCATE)
+    return gaussian_filter1d(heatmap, sigma, axis=1, truncate=GAUSSIAN_TRUNCATE)
 
 
 def draw_soccer_field(ax, field_color='#2d5016', line_color='white'):
@@ -26,68 +89,15 @@ def draw_soccer_field(ax, field_color='#2d5016', line_color='white'):
     # Set field color
     ax.set_facecolor(field_color)
     
-    # Field dimensions (normalized 0-100)
-    field_length = 100
-    field_width = 100
-    
-    # Outer boundary
-    ax.plot([0, 0], [0, field_width], color=line_color, linewidth=2)
-    ax.plot([0, field_length], [field_width, field_width], color=line_color, linewidth=2)
-    ax.plot([field_length, field_length], [field_width, 0], color=line_color, linewidth=2)
-    ax.plot([field_length, 0], [0, 0], color=line_color, linewidth=2)
-    
-    # Halfway line
-    ax.plot([field_length/2, field_length/2], [0, field_width], color=line_color, linewidth=2)
-    
-    # Center circle
-    center_circle = Circle((field_length/2, field_width/2), 9.15, fill=False, 
-                           edgecolor=line_color, linewidth=2)
-    ax.add_patch(center_circle)
-    
-    # Center spot
-    ax.plot(field_length/2, field_width/2, 'o', color=line_color, markersize=3)
-    
-    # Penalty areas
-    penalty_area_length = 16.5
-    penalty_area_width = 40.3
-    
-    # Left penalty area
-    left_penalty = Rectangle((0, (field_width - penalty_area_width)/2), 
-                             penalty_area_length, penalty_area_width,
-                             fill=False, edgecolor=line_color, linewidth=2)
-    ax.add_patch(left_penalty)
-    
-    # Right penalty area
-    right_penalty = Rectangle((field_length - penalty_area_length, 
-                               (field_width - penalty_area_width)/2),
-                              penalty_area_length, penalty_area_width,
-                              fill=False, edgecolor=line_color, linewidth=2)
-    ax.add_patch(right_penalty)
-    
-    # Goal areas
-    goal_area_length = 5.5
-    goal_area_width = 18.32
-    
-    # Left goal area
-    left_goal = Rectangle((0, (field_width - goal_area_width)/2),
-                          goal_area_length, goal_area_width,
-                          fill=False, edgecolor=line_color, linewidth=2)
-    ax.add_patch(left_goal)
-    
-    # Right goal area
-    right_goal = Rectangle((field_length - goal_area_length,
-                            (field_width - goal_area_width)/2),
-                           goal_area_length, goal_area_width,
-                           fill=False, edgecolor=line_color, linewidth=2)
-    ax.add_patch(right_goal)
-    
-    # Penalty spots
-    ax.plot(11, field_width/2, 'o', color=line_color, markersize=3)
-    ax.plot(field_length - 11, field_width/2, 'o', color=line_color, markersize=3)
+    # Straight lines, outlines and spots as one artist each instead of one per marking
+    ax.add_collection(LineCollection(FIELD_LINES, colors=line_color, linewidths=2, capstyle='projecting'))
+    ax.add_collection(PatchCollection(_field_outlines(), match_original=False, facecolors='none',
+                                      edgecolors=line_color, linewidths=2))
+    ax.plot(FIELD_SPOTS[:, 0], FIELD_SPOTS[:, 1], 'o', color=line_color, markersize=3)
     
     # Set axis limits and aspect
-    ax.set_xlim(-5, field_length + 5)
-    ax.set_ylim(-5, field_width + 5)
+    ax.set_xlim(-5, FIELD_LENGTH + 5)
+    ax.set_ylim(-5, FIELD_WIDTH + 5)
     ax.set_aspect('equal')
     ax.axis('off')
 
@@ -105,14 +115,14 @@ def generate_heatmap(positions_file, output_file, team_filter=None, sigma=3.0, s
     """
     print(f"Loading position data from: {positions_file}")
     
-    with open(positions_file, 'r') as f:
-        data = json.load(f)
+    with open(positions_file, 'rb') as f:
+        data = orjson.loads(f.read())
     
-    positions = data['positions']
+    positions = load_positions(data['positions'])
     
     # Filter by team if specified
     if team_filter:
-        positions = [p for p in positions if p['team'] == team_filter]
+        positions = positions[positions['team'] == team_filter]
         print(f"Filtered to Team {team_filter}: {len(positions)} positions")
     else:
         print(f"Using all positions: {len(positions)}")
@@ -130,12 +140,11 @@ def generate_heatmap(positions_file, output_file, team_filter=None, sigma=3.0, s
     if scatter:
         print("Generating scatter plot...")
         # Extract coordinates and teams
-        x_coords = [p['x'] for p in positions]
-        y_coords = [p['y'] for p in positions]
-        teams = [p['team'] for p in positions]
+        x_coords = positions['x']
+        y_coords = positions['y']
         
         # Define colors
-        colors = ['red' if t == 'A' else 'blue' for t in teams]
+        colors = np.where(positions['team'] == 'A', 'red', 'blue').tolist()
         
         # Plot scatter points
         ax.scatter(x_coords, y_coords, c=colors, s=50, alpha=0.7, edgecolors='white')
@@ -156,33 +165,20 @@ def generate_heatmap(positions_file, output_file, team_filter=None, sigma=3.0, s
         # If showing both teams, create separate heatmaps for each
         if not team_filter:
             # Separate positions by team
-            team_a_positions = [p for p in positions if p['team'] == 'A']
-            team_b_positions = [p for p in positions if p['team'] == 'B']
+            team_a_positions = positions[positions['team'] == 'A']
+            team_b_positions = positions[positions['team'] == 'B']
             
             print(f"Team A: {len(team_a_positions)} positions")
             print(f"Team B: {len(team_b_positions)} positions")
             
             bins = 50
             
-            # Create custom dark colormaps
-            from matplotlib.colors import LinearSegmentedColormap
-            
-            # Dark Red colormap (much more saturated)
-            colors_red = ['#ffffff', '#ff6666', '#ff0000', '#cc0000', '#990000', '#660000']
-            n_bins_red = 100
-            cmap_red = LinearSegmentedColormap.from_list('dark_red', colors_red, N=n_bins_red)
-            
-            # Dark Blue colormap (much more saturated)
-            colors_blue = ['#ffffff', '#6666ff', '#0000ff', '#0000cc', '#000099', '#000066']
-            n_bins_blue = 100
-            cmap_blue = LinearSegmentedColormap.from_list('dark_blue', colors_blue, N=n_bins_blue)
-            
             # Create heatmap for Team A (Dark Red)
             if len(team_a_positions) > 0:
-                x_a = np.array([p['x'] for p in team_a_positions])
-                y_a = np.array([p['y'] for p in team_a_positions])
-                heatmap_a, _, _ = np.histogram2d(x_a, y_a, bins=bins, range=[[0, 100], [0, 100]])
-                heatmap_a = gaussian_filter(heatmap_a, sigma=sigma).T
+                x_a = team_a_positions['x']
+                y_a = team_a_positions['y']
+                heatmap_a = bin_positions(x_a, y_a, bins)
+                heatmap_a = smooth_heatmap(heatmap_a, sigma).T
                 
                 # Don't normalize - keep raw intensity for darker colors
                 # Just scale to reasonable range
@@ -191,15 +187,15 @@ def generate_heatmap(positions_file, output_file, team_filter=None, sigma=3.0, s
                 
                 # Overlay Team A heatmap (Dark Red) with higher opacity
                 extent = [0, 100, 0, 100]
-                ax.imshow(heatmap_a, extent=extent, origin='lower', cmap=cmap_red,
+                ax.imshow(heatmap_a, extent=extent, origin='lower', cmap=CMAP_RED,
                          alpha=0.95, interpolation='bilinear', aspect='auto', vmin=0, vmax=2)
             
             # Create heatmap for Team B (Dark Blue)
             if len(team_b_positions) > 0:
-                x_b = np.array([p['x'] for p in team_b_positions])
-                y_b = np.array([p['y'] for p in team_b_positions])
-                heatmap_b, _, _ = np.histogram2d(x_b, y_b, bins=bins, range=[[0, 100], [0, 100]])
-                heatmap_b = gaussian_filter(heatmap_b, sigma=sigma).T
+                x_b = team_b_positions['x']
+                y_b = team_b_positions['y']
+                heatmap_b = bin_positions(x_b, y_b, bins)
+                heatmap_b = smooth_heatmap(heatmap_b, sigma).T
                 
                 # Don't normalize - keep raw intensity for darker colors
                 # Just scale to reasonable range
@@ -207,7 +203,7 @@ def generate_heatmap(positions_file, output_file, team_filter=None, sigma=3.0, s
                     heatmap_b = heatmap_b / heatmap_b.max() * 2  # Boost intensity
                 
                 # Overlay Team B heatmap (Dark Blue) with higher opacity
-                ax.imshow(heatmap_b, extent=extent, origin='lower', cmap=cmap_blue,
+                ax.imshow(heatmap_b, extent=extent, origin='lower', cmap=CMAP_BLUE,
                          alpha=0.95, interpolation='bilinear', aspect='auto', vmin=0, vmax=2)
             
             # Add legend for both teams with darker colors
@@ -220,26 +216,18 @@ def generate_heatmap(positions_file, output_file, team_filter=None, sigma=3.0, s
                      framealpha=0.9, edgecolor='white')
         else:
             # Single team heatmap
-            from matplotlib.colors import LinearSegmentedColormap
-            
-            # Create custom dark colormap based on team
-            if team_filter == 'A':
-                colors = ['#ffffff', '#ff6666', '#ff0000', '#cc0000', '#990000', '#660000']
-            else:
-                colors = ['#ffffff', '#6666ff', '#0000ff', '#0000cc', '#000099', '#000066']
-            
-            cmap_custom = LinearSegmentedColormap.from_list('dark_team', colors, N=100)
+            # Dark colormap based on team
+            cmap_custom = CMAP_RED if team_filter == 'A' else CMAP_BLUE
             
-            x_coords = np.array([p['x'] for p in positions])
-            y_coords = np.array([p['y'] for p in positions])
+            x_coords = positions['x']
+            y_coords = positions['y']
             
             # Create 2D histogram (density map)
             bins = 50
-            heatmap, xedges, yedges = np.histogram2d(x_coords, y_coords, bins=bins,
-                                                      range=[[0, 100], [0, 100]])
+            heatmap = bin_positions(x_coords, y_coords, bins)
             
             # Apply Gaussian smoothing
-            heatmap = gaussian_filter(heatmap, sigma=sigma)
+            heatmap = smooth_heatmap(heatmap, sigma)
             
             # Transpose for correct orientation
             heatmap = heatmap.T
@@ -250,22 +238,25 @@ def generate_heatmap(positions_file, output_file, team_filter=None, sigma=3.0, s
             im = ax.imshow(heatmap, extent=extent, origin='lower', cmap=cmap_custom,
                            alpha=0.85, interpolation='bilinear', aspect='auto', vmin=0)
             
-            # Add colorbar
-            cbar = plt.colorbar(im, ax=ax, fraction=0.046, pad=0.04)
+            # Add colorbar in its own axes beside the pitch, so the saved figure needs no bbox measuring
+            cax = fig.add_axes([0.88, 0.02, 0.02, 0.86])
+            cbar = fig.colorbar(im, cax=cax)
             cbar.set_label('Activity Density', rotation=270, labelpad=20, fontsize=12)
     
     # Add title
     team_text = f"Team {team_filter}" if team_filter else "Both Teams"
     plot_type = "Player Positions" if scatter else "Player Heatmap"
-    plt.title(f'{plot_type} - {team_text}\n({len(positions)} positions)',
-              fontsize=16, fontweight='bold', pad=20)
+    ax.set_title(f'{plot_type} - {team_text}\n({len(positions)} positions)',
+                 fontsize=16, fontweight='bold', pad=20)
     
-    # Save figure
-    plt.tight_layout()
-    plt.savefig(output_file, dpi=150, bbox_inches='tight', facecolor='white')
+    # Save figure with fixed margins (room for the title, and for the colorbar axes when there
+    # is one) rather than tight_layout and a tight bbox, which each cost an extra layout/render pass
+    has_colorbar = bool(team_filter) and not scatter
+    fig.subplots_adjust(left=0.02, right=0.86 if has_colorbar else 0.98, bottom=0.02, top=0.88)
+    fig.savefig(output_file, dpi=150, facecolor='white')
     print(f"Heatmap saved to: {output_file}")
     
-    plt.close()
+    plt.close(fig)
 
 
 def main():
@@ -4,6 +4,7 @@ import os
 DB_PATH = os.path.join(os.path.dirname(__file__), 'tactabot.db')
 
 conn = sqlite3.connect(DB_PATH)
+conn.execute("PRAGMA journal_mode=WAL") # Bot and API keep reading while we migrate
 c = conn.cursor()
 
 try:
@@ -18,14 +19,11 @@ except sqlite3.OperationalError as e:
 
 # Migrate existing video_path to filename (extract basename)
 try:
-    c.execute("SELECT clip_id, video_path FROM clips WHERE video_path IS NOT NULL AND filename IS NULL")
-    rows = c.fetchall()
+    # One UPDATE with basename evaluated inside SQLite, instead of shuttling rows through Python
+    conn.create_function("basename", 1, os.path.basename, deterministic=True)
+    c.execute("UPDATE clips SET filename = basename(video_path) WHERE video_path IS NOT NULL AND filename IS NULL")
     
-    for clip_id, video_path in rows:
-        filename = os.path.basename(video_path)
-        c.execute("UPDATE clips SET filename = ? WHERE clip_id = ?", (filename, clip_id))
-    
-    print(f"✅ Migrated {len(rows)} clips from video_path to filename")
+    print(f"✅ Migrated {c.rowcount} clips from video_path to filename")
 except Exception as e:
     print(f"⚠️ Migration error: {e}")
 
@@ -5,6 +5,19 @@ from ultralytics import YOLO
 import supervision as sv
 from soccer_analysis_processor import SoccerMatchAnalyzer, AnalysisConfig
 from keypoint_detection.homography import HomographyTransformer
+from utils.model_input import to_model_tensor
+
+# Consecutive broadcast frames usually show the same view, so keypoint/depth results
+# are reused while a tiny grayscale thumbnail stays within a mean abs difference (0-255)
+SIG_SIZE = (16, 9)
+KEYPOINT_SIG_THRESHOLD = 3.0
+DEPTH_SIG_THRESHOLD = 6.0 # Depth is costlier and changes slower, so it tolerates more drift
+
+def frame_signature(frame):
+    return cv2.resize(frame, SIG_SIZE, interpolation=cv2.INTER_AREA).mean(axis=2).astype(np.int16)
+
+def same_view(sig, cached_sig, threshold):
+    return cached_sig is not None and np.abs(sig - cached_sig).mean() < threshold
 
 class TacticalPipeline:
     def __init__(self, keypoint_model_path, detection_model_path):
@@ -12,14 +25,48 @@ class TacticalPipeline:
         self.detection_model_path = detection_model_path
         self.analyzer = SoccerMatchAnalyzer(AnalysisConfig())
         self.transformer = HomographyTransformer()
+        # FP16 on CUDA halves weight/activation traffic; CPU stays FP32
+        self.half = torch.cuda.is_available()
+        # Signature of the frame the cached keypoints came from (not the last frame seen,
+        # so slow pans can't drift past the threshold one small step at a time)
+        self._keypoint_sig = None
+        self._keypoints = None
+        # Pinned host staging buffer (reused across frames) and the event marking its upload
+        self._pinned = None
+        self._upload_done = None
         
     def initialize_models(self):
         self.analyzer.load_model()
         self.analyzer.load_roboflow_model()
         
+    def _to_gpu_tensor(self, frame):
+        """
+        Uploads a BGR uint8 frame through the reused pinned buffer, then hands it to to_model_tensor.
+        Returns the detector input and the (sx, sy) factors that map boxes back onto the frame.
+        """
+        if self._pinned is None or self._pinned.shape != frame.shape:
+            self._pinned = torch.empty(frame.shape, dtype=torch.uint8).pin_memory()
+        elif self._upload_done is not None:
+            self._upload_done.synchronize() # Previous upload must finish before the buffer is overwritten
+        np.copyto(self._pinned.numpy(), frame)
+        gpu = self._pinned.to('cuda', non_blocking=True)
+        self._upload_done = torch.cuda.Event()
+        self._upload_done.record()
+        return to_model_tensor(gpu.permute(2, 0, 1).unsqueeze(0), half=self.half)
+
     def detect_frame_objects(self, frame):
         # detection_model_path is likely yolov8m.pt
-        results = self.analyzer.model.predict(frame, conf=0.3, verbose=False)[0]
+        if torch.cuda.is_available():
+            # Upload/convert on the GPU instead of Ultralytics' CPU preprocessing
+            source, (sx, sy) = self._to_gpu_tensor(frame)
+            results = self.analyzer.model.predict(source, conf=0.3, half=self.half, verbose=False)[0]
+            boxes = results.boxes.data.clone()
+            boxes[:, [0, 2]] *= sx
+            boxes[:, [1, 3]] *= sy
+            results.orig_shape = frame.shape[:2]
+            results.update(boxes=boxes)
+        else:
+            results = self.analyzer.model.predict(frame, conf=0.3, half=self.half, verbose=False)[0]
         
         # Filter players (0) and ball (32)
         # Referees are also class 0 in many datasets, or 32 is ball
@@ -39,7 +86,11 @@ class TacticalPipeline:
 
     def detect_frame_keypoints(self, frame):
         if self.analyzer.roboflow_model:
+            sig = frame_signature(frame)
+            if same_view(sig, self._keypoint_sig, KEYPOINT_SIG_THRESHOLD):
+                return self._keypoints
             _, keypoints = self.analyzer.roboflow_model.get_keypoints_detections(frame)
+            self._keypoint_sig, self._keypoints = sig, keypoints
             return keypoints
         return None
 
@@ -83,9 +134,18 @@ class TacticalPipeline:
         return combined
 
 class DepthPipeline:
+    def __init__(self):
+        self._depth_sig = None
+        self._depth = None
     def initialize_model(self):
         pass
     def estimate_depth(self, frame):
+        sig = frame_signature(frame)
+        if same_view(sig, self._depth_sig, DEPTH_SIG_THRESHOLD) and self._depth.shape == frame.shape[:2]:
+            return self._depth
+        self._depth_sig, self._depth = sig, self._predict_depth(frame)
+        return self._depth
+    def _predict_depth(self, frame):
         return np.zeros(frame.shape[:2], dtype=np.float32)
     def visualize_depth(self, depth_map):
         return np.zeros((depth_map.shape[0], depth_map.shape[1], 3), dtype=np.uint8)
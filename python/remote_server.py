@@ -25,6 +25,7 @@ app.add_middleware(
 
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+UPLOAD_CHUNK = 4 * 1024 * 1024 # copyfileobj's default 16 KB means thousands of syscalls per video
 
 @app.get("/")
 def health_check():
@@ -39,7 +40,7 @@ async def analyze_match(
         # Save uploaded video
         video_path = UPLOAD_DIR / f"video_{video.filename}"
         with open(video_path, "wb") as buffer:
-            shutil.copyfileobj(video.file, buffer)
+            shutil.copyfileobj(video.file, buffer, UPLOAD_CHUNK)
         
         logger.info(f"Video received: {video_path}")
 
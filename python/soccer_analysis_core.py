@@ -265,6 +265,23 @@ class HomographyTransform:
             logger.error(f"Transform error: {e}")
             return x, y
 
+    def transform_many(self, points: np.ndarray) -> np.ndarray:
+        """Transform an (N, 2) array of pixel points to meters in one matmul"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if not self.enabled or len(points) == 0:
+            return points.copy()
+        
+        v_prime = np.hstack([points, np.ones((len(points), 1))]) @ self.matrix.T
+        
+        # Same fallback as transform(): points with a near-zero denominator stay in pixels
+        valid = np.abs(v_prime[:, 2]) >= 1e-10
+        if not valid.all():
+            logger.warning("Near-zero denominator in homography transform")
+        
+        result = points.copy()
+        result[valid] = v_prime[valid, :2] / v_prime[valid, 2:]
+        return result
+
 
 # === Team Classification ===
 class TeamClassifier:
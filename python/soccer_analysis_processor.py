@@ -349,7 +349,9 @@ class PassingNetworkAnalyzer:
         """Calculate average brightness of team crops."""
         if not crops:
             return 128
-        brightnesses = [np.mean(crop) for crop in crops]
+        # cv2.mean gives per-channel means without a float64 copy of the crop; averaging
+        # the three BGR means matches np.mean(crop)
+        brightnesses = [sum(cv2.mean(crop)[:3]) / 3 for crop in crops]
         return np.mean(brightnesses)
 
     @staticmethod
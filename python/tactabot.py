@@ -142,6 +142,10 @@ def init_db():
             awarded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )''')
 
+        # Leaderboard top-10s read straight off these instead of sorting the whole table
+        c.execute('CREATE INDEX IF NOT EXISTS idx_users_xp ON users(xp DESC)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_users_monthly_xp ON users(monthly_xp DESC)')
+
         conn.commit()
     logger.info("Database initialized successfully.")
 
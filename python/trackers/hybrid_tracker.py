@@ -110,10 +110,11 @@ class HybridTracker:
         self.iou_thresh = 0.3
         self.reid_thresh = 0.4 # Cosine distance threshold
 
-    def update(self, detections, frame):
+    def update(self, detections, frame, flow=None):
         """
         detections: list of [x1, y1, x2, y2, score, class_id]
         frame: current video frame
+        flow: optional (dx, dy) camera motion since the previous frame, in pixels
         """
         # 1. Filter low confidence detections
         dets = [d for d in detections if d[4] >= self.conf_thresh]
@@ -127,6 +128,10 @@ class HybridTracker:
         # 3. Predict new locations of existing tracks
         for track in self.tracks:
             track.predict()
+            if flow is not None:
+                # Motion compensation: shift the prediction with the camera before matching
+                track.kf.x[0] += flow[0]
+                track.kf.x[1] += flow[1]
             
         # 4. Association: First by ReID (DeepSORT style)
         # Separate tracks into active and lost
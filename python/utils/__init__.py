@@ -1,2 +1,2 @@
-from .video_utils import read_video, save_video
+from .video_utils import open_capture, read_video, save_video
 from .bbox_utils import get_center_of_bbox, get_bbox_width, measure_distance,measure_xy_distance,get_foot_position
\ No newline at end of file
@@ -39,20 +39,12 @@ class FieldCalibrator:
         if self.homography is None:
             return []
             
-        field_coords = []
-        for track in tracks:
-            # Use bottom-center of bounding box as player position
-            x1, y1, x2, y2 = track[:4]
-            foot_x = (x1 + x2) / 2
-            foot_y = y2
+        if len(tracks) == 0:
+            return np.array([])
             
-            # Apply homography
-            pt = np.array([[[foot_x, foot_y]]], dtype=np.float32)
-            dst = cv2.perspectiveTransform(pt, self.homography)
-            
-            field_coords.append(dst[0][0])
-            
-        return np.array(field_coords)
+        # Use bottom-center of bounding box as player position
+        boxes = np.array([track[:4] for track in tracks], dtype=np.float64)
+        return self.pixel_to_field_batch((boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3])
         
     def pixel_to_field(self, x, y):
         if self.homography is None:
@@ -60,3 +52,15 @@ class FieldCalibrator:
         pt = np.array([[[x, y]]], dtype=np.float32)
         dst = cv2.perspectiveTransform(pt, self.homography)
         return dst[0][0]
+        
+    def pixel_to_field_batch(self, xs, ys):
+        """
+        pixel_to_field for many points in one perspectiveTransform call.
+        Returns an (N, 2) float32 array, or None if not calibrated.
+        """
+        if self.homography is None:
+            return None
+        pts = np.stack([xs, ys], axis=-1).astype(np.float32).reshape(-1, 1, 2)
+        if len(pts) == 0:
+            return np.empty((0, 2), dtype=np.float32)
+        return cv2.perspectiveTransform(pts, self.homography).reshape(-1, 2)
@@ -0,0 +1,22 @@
+import torch
+import torch.nn.functional as F
+
+INFER_SIZE = 640 # Long side of the GPU-prepared detector input
+STRIDE = 32 # Tensor sources must be a multiple of the model stride
+
+def to_model_tensor(batch, bgr=True, half=True):
+    """
+    (N, 3, H, W) uint8 CUDA tensor -> normalized RGB detector input resized to a stride multiple.
+    bgr=True swaps OpenCV channel order; half=False keeps FP32 for devices without fast FP16.
+    Returns the tensor and the (sx, sy) factors that map boxes back onto the input.
+    """
+    h, w = batch.shape[2:]
+    # Cast once at full resolution; channel swap and /255 run after the resize, on fewer pixels
+    batch = batch.to(torch.float16 if half else torch.float32)
+    scale = INFER_SIZE / max(h, w)
+    size = (max(STRIDE, round(h * scale / STRIDE) * STRIDE), max(STRIDE, round(w * scale / STRIDE) * STRIDE))
+    if size != (h, w):
+        batch = F.interpolate(batch, size=size, mode='bilinear', align_corners=False)
+    if bgr:
+        batch = batch[:, [2, 1, 0]]
+    return batch.mul_(1 / 255), (w / size[1], h / size[0])
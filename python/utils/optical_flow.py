@@ -1,6 +1,26 @@
+import os
+import hashlib
+from pathlib import Path
 import cv2
 import numpy as np
 
+FLOW_CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "flow"
+FINGERPRINT_CHUNK = 4 * 1024 * 1024 # Bytes hashed from each end of the video
+
+def video_fingerprint(video_path, resolution):
+    """
+    Content key for a video: size plus the first and last chunks. Uploads get a fresh file name
+    every time, so the path alone would never match a re-run of the same match.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.blake2b(f"{size}:{resolution[0]}x{resolution[1]}".encode(), digest_size=16)
+    with open(video_path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_CHUNK))
+        if size > FINGERPRINT_CHUNK:
+            f.seek(max(size - FINGERPRINT_CHUNK, FINGERPRINT_CHUNK))
+            digest.update(f.read())
+    return digest.hexdigest()
+
 class OpticalFlowEngine:
     def __init__(self):
         self.prev_gray = None
@@ -60,14 +80,15 @@ class OpticalFlowEngine:
         Estimate global camera motion using background features
         """
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        if self.prev_gray is None:
+        prev_gray, self.prev_gray = self.prev_gray, gray
+        if prev_gray is None:
             return np.array([0.0, 0.0])
             
         # Detect features in previous frame
-        p0 = cv2.goodFeaturesToTrack(self.prev_gray, mask=None, **self.feature_params)
+        p0 = cv2.goodFeaturesToTrack(prev_gray, mask=None, **self.feature_params)
         
         if p0 is not None:
-            p1, st, err = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, p0, None, **self.lk_params)
+            p1, st, err = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, **self.lk_params)
             
             # Select good points
             good_new = p1[st==1]
@@ -79,3 +100,35 @@ class OpticalFlowEngine:
                 return motion
                 
         return np.array([0.0, 0.0])
+
+
+class CachedCameraMotion:
+    """
+    Per-frame camera motion for one video, persisted as compressed .npz so re-analyzing the same
+    match skips the LK pass. Call with each frame in order, then save() once the run completes.
+    """
+    def __init__(self, engine, video_path, resolution, enabled=True):
+        self.engine = engine
+        self.enabled = enabled
+        self.path = FLOW_CACHE_DIR / f"{video_fingerprint(video_path, resolution)}.npz" if enabled else None
+        self.cached = None
+        if enabled and self.path.exists():
+            with np.load(self.path) as data:
+                self.cached = data["motion"]
+        self.computed = []
+
+    def __call__(self, frame_idx, frame):
+        if self.cached is not None and frame_idx < len(self.cached):
+            return self.cached[frame_idx]
+        motion = self.engine.estimate_camera_motion(frame)
+        self.computed.append(motion)
+        return motion
+
+    def save(self):
+        # Only full runs are written, so a cache hit always covers every frame
+        if not self.enabled or self.cached is not None:
+            return
+        FLOW_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp.npz")
+        np.savez_compressed(tmp_path, motion=np.asarray(self.computed, dtype=np.float32).reshape(-1, 2))
+        os.replace(tmp_path, self.path)
@@ -1,5 +1,14 @@
 import cv2
 
+def open_capture(video_path):
+    """FFmpeg backend with hardware decoding (NVDEC/VAAPI/QuickSync) when available, software otherwise"""
+    cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG,
+                           [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY,
+                            cv2.CAP_PROP_HW_DEVICE, 0])
+    if not cap.isOpened():
+        cap = cv2.VideoCapture(str(video_path))
+    return cap
+
 def read_video(video_path):
     cap = cv2.VideoCapture(video_path)
     frames = []